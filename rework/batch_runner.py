@@ -0,0 +1,164 @@
+"""Run many headless operations across all cores, for balancing.
+
+Each finished run is appended to a JSONL file as it completes; aggregate rates
+(with 95% Wilson intervals) are printed at the end.
+
+Run from the rework folder:
+    python batch_runner.py -n 500 --out runs.jsonl
+    python batch_runner.py -n 200 --map 64x40 --team Leader,Scout,Scout,Medic --weapon Scout=Shotgun --anomaly threat=14:20
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+from sim_core import OperationCore, ROLE_TEMPLATES, WEAPONS, DEFAULT_TEAM, ANOMALY_STAT_RANGES, PATH_BUDGET_NODES
+
+
+def run_one(seed: int, options: Dict) -> Dict:
+    t0 = time.perf_counter()
+    # no LOS table: every run is a new map, and building one costs more than it saves in a single run
+    sim = OperationCore(precompute_los=False, seed=seed, **options)
+    while not sim.finished:
+        sim.step()
+    return {"seed": seed, **sim.summary(), "wall": round(time.perf_counter() - t0, 3)}
+
+
+def wilson(k: int, n: int, z: float = 1.96) -> Tuple[float, float]:
+    # score interval for a binomial rate; sane at 0/n and n/n, unlike p +- z*se
+    if n == 0:
+        return 0.0, 1.0
+    p = k / n
+    d = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / d
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / d
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+# ==========================
+# Arguments
+# ==========================
+def _map_size(text: str) -> Tuple[int, int]:
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WxH, got {text!r}")
+    if w < 20 or h < 17:
+        raise argparse.ArgumentTypeError("map must be at least 20x17 to fit a building")
+    return w, h
+
+
+def _team(text: str) -> List[str]:
+    roles = [r.strip() for r in text.split(",") if r.strip()]
+    unknown = [r for r in roles if r not in ROLE_TEMPLATES]
+    if not roles or unknown:
+        raise argparse.ArgumentTypeError(f"roles must be from {', '.join(ROLE_TEMPLATES)}")
+    return roles
+
+
+def _weapon(text: str) -> Tuple[str, str]:
+    role, _, weapon = text.partition("=")
+    if role not in ROLE_TEMPLATES or weapon not in WEAPONS:
+        raise argparse.ArgumentTypeError(f"expected ROLE=WEAPON with a weapon from {', '.join(WEAPONS)}")
+    return role, weapon
+
+
+def _stat_range(text: str) -> Tuple[str, Tuple[int, int]]:
+    stat, _, span = text.partition("=")
+    lo, _, hi = span.partition(":")
+    try:
+        lo, hi = int(lo), int(hi or lo)
+    except ValueError:
+        lo, hi = 1, 0
+    if stat not in ANOMALY_STAT_RANGES or not 0 <= lo <= hi <= 20:
+        raise argparse.ArgumentTypeError(f"expected STAT=LO:HI (0..20) for one of {', '.join(ANOMALY_STAT_RANGES)}")
+    return stat, (lo, hi)
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Run headless operations in parallel and report success rates.")
+    ap.add_argument("-n", "--runs", type=int, default=100)
+    ap.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--seed", type=int, default=0, help="run i uses seed + i; with default options main.py --seed replays it")
+    ap.add_argument("--path-budget-nodes", type=int, default=PATH_BUDGET_NODES,
+                    help="search budget per tick, as in main.py; 0 plans every path immediately (won't match a replay)")
+    ap.add_argument("--out", default="runs.jsonl", help="JSONL file for per-run summaries ('-' for stdout)")
+    ap.add_argument("--map", type=_map_size, default=(52, 34), metavar="WxH")
+    ap.add_argument("--team", type=_team, default=list(DEFAULT_TEAM), help="comma separated roles")
+    ap.add_argument("--weapon", type=_weapon, action="append", default=[], metavar="ROLE=WEAPON")
+    ap.add_argument("--anomaly", type=_stat_range, action="append", default=[], metavar="STAT=LO:HI")
+    return ap.parse_args(argv)
+
+
+# ==========================
+# Report
+# ==========================
+def report(results: List[Dict], wall: float, out=sys.stdout):
+    n = len(results)
+    if n == 0:
+        return
+
+    def rate(label: str, k: int):
+        lo, hi = wilson(k, n)
+        print(f"  {label:<12} {k:>5}/{n:<5} {k / n * 100:5.1f}%  (95% CI {lo * 100:5.1f} - {hi * 100:5.1f}%)", file=out)
+
+    def mean(key: str) -> float:
+        return sum(r[key] for r in results) / n
+
+    print(f"{n} operations in {wall:.1f} s ({n / wall * 60:.0f}/min)", file=out)
+    rate("success", sum(r["phase"] == "success" for r in results))
+    rate("contained", sum(r["contained"] for r in results))
+    for outcome in ("extracted", "deadline", "escaped", "team_lost"):
+        rate(outcome, sum(r["outcome"] == outcome for r in results))
+    shots = sum(r["shots_fired"] for r in results)
+    hits = sum(r["shots_hit"] for r in results)
+    print(f"  mean elapsed {mean('elapsed'):.1f} s, KIA {mean('kia'):.2f}, shots {mean('shots_fired'):.1f}"
+          f" ({hits / max(1, shots) * 100:.0f}% hit), containment attempts {mean('containment_attempts'):.1f}", file=out)
+
+
+def run_options(args) -> Dict:
+    return {
+        "map_w": args.map[0],
+        "map_h": args.map[1],
+        "team": args.team,
+        "role_weapons": dict(args.weapon),
+        "anomaly_ranges": dict(args.anomaly),
+        "path_budget_nodes": args.path_budget_nodes or None,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = run_options(args)
+
+    sink = sys.stdout if args.out == "-" else open(args.out, "w")
+    # keep the report off stdout when the runs are streamed there
+    log = sys.stderr if sink is sys.stdout else sys.stdout
+    results = []
+    t0 = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(run_one, args.seed + i, options) for i in range(args.runs)]
+            try:
+                for fut in as_completed(futures):
+                    rec = fut.result()
+                    results.append(rec)
+                    sink.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                    sink.flush()
+            except KeyboardInterrupt:
+                # report what finished instead of waiting on the queued runs
+                for fut in futures:
+                    fut.cancel()
+                print("interrupted", file=log)
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+    report(results, time.perf_counter() - t0, out=log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Sustained-pursuit benchmark: full A* replans vs the incremental ChasePlanner.
+
+The target random-walks a few cells between replans while the chaser follows
+its path, like a chaser tracking team_last_known_anomaly.
+
+Run from the rework folder:  python bench_chase.py [maps] [replans] [map_w] [map_h]
+"""
+import random
+import sys
+import time
+
+from sim_core import generate_facility
+from pathfinding import astar
+from chase_planner import ChasePlanner
+
+
+def floor_cells(grid):
+    return [(x, y) for y in range(len(grid)) for x in range(len(grid[0])) if grid[y][x] != 1]
+
+
+def drift(grid, cell, steps):
+    for _ in range(steps):
+        x, y = cell
+        options = [c for c in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)) if grid[c[1]][c[0]] != 1]
+        if options:
+            cell = random.choice(options)
+    return cell
+
+
+def run(num_maps=10, replans=100, map_w=52, map_h=34, seed=99):
+    random.seed(seed)
+    scenarios = []
+    for _ in range(num_maps):
+        grid, _, _ = generate_facility(map_w, map_h, num_buildings=6)
+        cells = floor_cells(grid)
+        start, goal = random.choice(cells), random.choice(cells)
+        moves = [(random.randint(1, 2), random.randint(0, 3)) for _ in range(replans)]
+        scenarios.append((grid, start, goal, moves))
+
+    totals = {}
+    for name in ("astar", "chase"):
+        expanded = 0
+        t0 = time.perf_counter()
+        for grid, start, goal, moves in scenarios:
+            random.seed(seed)
+            planner = ChasePlanner(grid, start, goal) if name == "chase" else None
+            for walk, goal_steps in moves:
+                if planner is None:
+                    stats = {"expanded": 0}
+                    path = astar(grid, start, goal, stats=stats)
+                    expanded += stats["expanded"]
+                else:
+                    planner.move_start(start)
+                    planner.move_goal(goal)
+                    before = planner.expanded
+                    path = planner.path()
+                    expanded += planner.expanded - before
+                if len(path) > walk:
+                    start = path[walk]
+                goal = drift(grid, goal, goal_steps)
+        totals[name] = (time.perf_counter() - t0, expanded)
+
+    total = num_maps * replans
+    print(f"{total} replans on {num_maps} maps ({map_w}x{map_h})")
+    for name, (secs, expanded) in totals.items():
+        print(f"  {name:<6} {secs * 1e6 / total:8.1f} us/replan  {expanded / total:8.1f} expansions/replan")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
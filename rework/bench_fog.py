@@ -0,0 +1,101 @@
+"""Per-frame fog cost: the old per-cell Bresenham scan vs shadowcasting.
+
+Run from the rework folder:  python bench_fog.py [maps] [frames] [map_w] [map_h] [operatives]
+"""
+import random
+import sys
+import time
+
+from sim_core import generate_facility, los_clear, manhattan
+from navgrid import NavGrid
+from fov import FieldOfView
+
+
+def fog_los(grid, revealed, ops, w, h):
+    # the previous update_fog: LOS test for every cell in each perception diamond
+    for (gx, gy), r in ops:
+        for yy in range(gy - r, gy + r + 1):
+            for xx in range(gx - r, gx + r + 1):
+                if 0 <= xx < w and 0 <= yy < h:
+                    if manhattan((gx, gy), (xx, yy)) <= r:
+                        if los_clear(grid, (gx, gy), (xx, yy)):
+                            revealed.set(xx, yy)
+
+
+def fog_shadowcast(grid, fov, revealed, ops):
+    for origin, r in ops:
+        fov.compute(grid, origin, r)
+        revealed.set_many(fov.lit)
+
+
+def sweep_diff(grid, fov, ops, w):
+    # per sweep: cells shadowcasting lights that los_clear rejects (floor / wall), and the reverse
+    extra_floor = extra_wall = missed = seen = 0
+    for (gx, gy), r in ops:
+        los = set()
+        for yy in range(gy - r, gy + r + 1):
+            for xx in range(gx - r, gx + r + 1):
+                if 0 <= xx < w and 0 <= yy < len(grid) and manhattan((gx, gy), (xx, yy)) <= r:
+                    if los_clear(grid, (gx, gy), (xx, yy)):
+                        los.add(yy * w + xx)
+        fov.compute(grid, (gx, gy), r)
+        lit = set(fov.lit)
+        for i in lit - los:
+            if grid.data[i] == 1:
+                extra_wall += 1
+            else:
+                extra_floor += 1
+        missed += len(los - lit)
+        seen += len(los)
+    return extra_floor, extra_wall, missed, seen
+
+
+def run(num_maps=5, frames=200, map_w=52, map_h=34, operatives=4, seed=7):
+    random.seed(seed)
+    scenarios = []
+    for _ in range(num_maps):
+        grid, building_id, _ = generate_facility(map_w, map_h, num_buildings=6)
+        nav = NavGrid.from_lists(grid, building_id)
+        cells = nav.floor_cells()
+        frame_ops = [[(random.choice(cells), random.randint(3, 9)) for _ in range(operatives)] for _ in range(frames)]
+        scenarios.append((nav, frame_ops))
+
+    counts = {}
+    t0 = time.perf_counter()
+    for nav, frame_ops in scenarios:
+        nav.revealed.clear()
+        for ops in frame_ops:
+            fog_los(nav, nav.revealed, ops, map_w, map_h)
+        counts["los"] = counts.get("los", 0) + nav.revealed.count()
+    los = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for nav, frame_ops in scenarios:
+        nav.revealed.clear()
+        fov = FieldOfView(map_w, map_h)
+        for ops in frame_ops:
+            fog_shadowcast(nav, fov, nav.revealed, ops)
+        counts["shadowcast"] = counts.get("shadowcast", 0) + nav.revealed.count()
+    shadow = time.perf_counter() - t0
+
+    total = num_maps * frames
+    print(f"{total} fog updates, {operatives} operatives, {map_w}x{map_h}")
+    print(f"  los        {los * 1e6 / total:8.1f} us/frame  revealed {counts['los']}")
+    print(f"  shadowcast {shadow * 1e6 / total:8.1f} us/frame  revealed {counts['shadowcast']}  ({los / shadow:.1f}x)")
+
+    # the revealed union hides most differences, so compare single sweeps too
+    extra_floor = extra_wall = missed = seen = 0
+    for nav, frame_ops in scenarios:
+        fov = FieldOfView(map_w, map_h)
+        for ops in frame_ops:
+            f, wl, m, n = sweep_diff(nav, fov, ops, map_w)
+            extra_floor, extra_wall, missed, seen = extra_floor + f, extra_wall + wl, missed + m, seen + n
+    sweeps = total * operatives
+    print(f"  per sweep vs los_clear ({seen / sweeps:.1f} cells): +{extra_floor / seen * 100:.2f}% floor,"
+          f" +{extra_wall / seen * 100:.2f}% wall, -{missed / seen * 100:.2f}% missed"
+          f" ({extra_floor + extra_wall} extra, {missed} missed over {sweeps} sweeps)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
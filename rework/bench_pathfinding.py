@@ -0,0 +1,72 @@
+"""Compares the pathfinding engines on generated facilities.
+
+Run from the rework folder:
+    python bench_pathfinding.py [maps] [queries] [map_w] [map_h] [buildings]
+e.g. `python bench_pathfinding.py 3 300 240 160 40` for large maps.
+"""
+import random
+import sys
+import time
+
+from sim_core import generate_facility
+from pathfinding import PATH_METHODS
+from hpa import HierarchicalPlanner
+
+
+def floor_cells(grid):
+    return [(x, y) for y in range(len(grid)) for x in range(len(grid[0])) if grid[y][x] != 1]
+
+
+def run(num_maps=20, queries=200, map_w=52, map_h=34, num_buildings=6, seed=1234):
+    random.seed(seed)
+    jobs = []
+    for _ in range(num_maps):
+        grid, building_id, buildings = generate_facility(map_w, map_h, num_buildings=num_buildings)
+        cells = floor_cells(grid)
+        jobs.append((grid, building_id, buildings, [(random.choice(cells), random.choice(cells)) for _ in range(queries)]))
+
+    results = {}
+    lengths = {}
+    for name, fn in PATH_METHODS.items():
+        stats = {"expanded": 0}
+        lens = []
+        t0 = time.perf_counter()
+        for grid, _, _, pairs in jobs:
+            for a, b in pairs:
+                lens.append(len(fn(grid, a, b, stats=stats)))
+        results[name] = (time.perf_counter() - t0, stats["expanded"])
+        lengths[name] = lens
+
+    # hierarchical: precompute once per map, then time queries separately
+    t0 = time.perf_counter()
+    planners = [HierarchicalPlanner(grid, building_id, buildings) for grid, building_id, buildings, _ in jobs]
+    build = time.perf_counter() - t0
+    for label, full in (("hpa", True), ("hpa-1st", False)):
+        lens = []
+        t0 = time.perf_counter()
+        for planner, (_, _, _, pairs) in zip(planners, jobs):
+            for a, b in pairs:
+                lens.append(len(planner.find_path(a, b, full=full)))
+        results[label] = (time.perf_counter() - t0, None)
+        lengths[label] = lens
+
+    total = num_maps * queries
+    ref = lengths["astar"]
+    print(f"{total} queries on {num_maps} maps ({map_w}x{map_h}, {num_buildings} buildings)")
+    for name, (secs, expanded) in results.items():
+        line = f"  {name:<8} {secs * 1e6 / total:8.1f} us/query"
+        if expanded is not None:
+            line += f"  {expanded / total:8.1f} expansions/query"
+        if name == "hpa":
+            overhead = sum(lengths[name]) / max(1, sum(ref)) - 1.0
+            line += f"  path length vs astar: +{overhead * 100:.1f}%"
+        elif name != "hpa-1st":
+            mismatches = sum(1 for a, b in zip(ref, lengths[name]) if a != b)
+            line += f"  length mismatches vs astar: {mismatches}"
+        print(line)
+    print(f"  hpa precompute: {build * 1e3 / num_maps:.1f} ms/map")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
@@ -0,0 +1,49 @@
+"""Main-loop cost of a replanning burst: inline searches vs the worker pool.
+
+Run from the rework folder:  python bench_workers.py [entities] [workers] [map_w] [map_h]
+"""
+import random
+import sys
+import time
+
+from sim_core import generate_facility
+from pathfinding import find_path
+from path_workers import PathWorkerPool
+
+
+def run(entities=48, workers=4, map_w=120, map_h=80, seed=5):
+    random.seed(seed)
+    grid, _, _ = generate_facility(map_w, map_h, num_buildings=12)
+    cells = [(x, y) for y in range(map_h) for x in range(map_w) if grid[y][x] != 1]
+    pairs = [(random.choice(cells), random.choice(cells)) for _ in range(entities)]
+
+    t0 = time.perf_counter()
+    for a, b in pairs:
+        find_path(grid, a, b)
+    inline = time.perf_counter() - t0
+    print(f"{entities} simultaneous replans on {map_w}x{map_h}")
+    print(f"  inline           main loop blocked {inline * 1e3:8.2f} ms")
+
+    for mode in ("thread", "process"):
+        pool = PathWorkerPool(workers=workers, mode=mode)
+        pool.set_grid(grid, revision=1)
+        # warm the workers up so pool start-up isn't counted
+        for req in [pool.submit(a, b) for a, b in pairs[:workers]]:
+            req.future.result()
+        pool.collect()
+
+        t0 = time.perf_counter()
+        for a, b in pairs:
+            pool.submit(a, b)
+        blocked = time.perf_counter() - t0
+        while pool.in_flight:
+            pool.collect()
+            time.sleep(1 / 240)
+        total = time.perf_counter() - t0
+        print(f"  {mode:<7} x{workers:<2}     main loop blocked {blocked * 1e3:8.2f} ms, all results after {total * 1e3:8.2f} ms")
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
@@ -0,0 +1,147 @@
+import heapq
+from typing import List, Tuple, Dict, Iterable
+
+from pathfinding import _padded_cells, WALL
+
+INF = float("inf")
+
+
+class ChasePlanner:
+    """Incremental planner for one chaser following a moving target.
+
+    Keeps a forward A* search tree rooted at the chaser between replans
+    (Fringe-Retrieving A*, Sun, Yeoh & Koenig 2009):
+      - when the target moves, closed cells already hold exact distances, so a
+        target inside the tree costs nothing and one outside it only needs the
+        open list re-keyed and a few more expansions;
+      - when the chaser moves along its path, the subtree below its new cell is
+        kept (distances shifted by a constant) and only the fringe around it is
+        re-opened, instead of searching from scratch.
+    Replanning work therefore follows how far things moved, not the map size.
+    Map edits reach it through notify_changed() (OperationCore.mark_grid_changed),
+    which patches the tiles and restarts the tree.
+    """
+
+    def __init__(self, grid, start: Tuple[int, int], goal: Tuple[int, int], revision: int = 0):
+        self.revision = revision
+        self.stride = len(grid[0]) + 2
+        self.cells = bytearray(_padded_cells(grid))
+        self.goal = self._index(goal)
+        self.expanded = 0
+        self._reset(self._index(start))
+
+    def _index(self, cell: Tuple[int, int]) -> int:
+        return (cell[1] + 1) * self.stride + cell[0] + 1
+
+    def _cell(self, i: int) -> Tuple[int, int]:
+        y, x = divmod(i, self.stride)
+        return (x - 1, y - 1)
+
+    def _h(self, i: int) -> int:
+        ay, ax = divmod(i, self.stride)
+        by, bx = divmod(self.goal, self.stride)
+        return abs(ax - bx) + abs(ay - by)
+
+    def _reset(self, root: int):
+        self.root = root
+        self.g: Dict[int, int] = {root: 0}
+        self.parent: Dict[int, int] = {root: -1}
+        self.closed = set()
+        self.heap = [(self._h(root), 0, root)]
+
+    def _expand(self):
+        # plain A* from the current open list until the goal is closed (or nothing is left)
+        g, parent, closed, heap, cells, W = self.g, self.parent, self.closed, self.heap, self.cells, self.stride
+        goal = self.goal
+        gy, gx = divmod(goal, W)
+        n = 0
+        while heap and goal not in closed:
+            _, d, i = heapq.heappop(heap)
+            if i in closed or d != g[i]:
+                continue
+            closed.add(i)
+            n += 1
+            nd = d + 1
+            for j in (i + 1, i - 1, i + W, i - W):
+                if cells[j] == WALL or j in closed or nd >= g.get(j, INF):
+                    continue
+                g[j] = nd
+                parent[j] = i
+                y, x = divmod(j, W)
+                heapq.heappush(heap, (nd + abs(x - gx) + abs(y - gy), nd, j))
+        self.expanded += n
+        return n
+
+    def move_goal(self, goal: Tuple[int, int]):
+        i = self._index(goal)
+        if i == self.goal:
+            return
+        self.goal = i
+        # open g-values are still valid tentative distances; only the heuristic changed
+        self.heap = [(d + self._h(j), d, j) for _, d, j in self.heap if j not in self.closed and d == self.g[j]]
+        heapq.heapify(self.heap)
+
+    def move_start(self, start: Tuple[int, int]):
+        new_root = self._index(start)
+        if new_root == self.root:
+            return
+        if new_root not in self.closed:
+            self._reset(new_root)
+            return
+
+        # keep the closed cells whose tree path runs through the new root
+        parent = self.parent
+        inside = {new_root: True}
+        for c in self.closed:
+            chain = []
+            while c not in inside and c >= 0:
+                chain.append(c)
+                c = parent[c]
+            verdict = inside.get(c, False)
+            for x in chain:
+                inside[x] = verdict
+
+        offset = self.g[new_root]
+        keep = [c for c, v in inside.items() if v]
+        g = {c: self.g[c] - offset for c in keep}
+        new_parent = {c: parent[c] for c in keep}
+        new_parent[new_root] = -1
+        closed = set(keep)
+
+        # re-open the fringe around the kept subtree
+        cells, W = self.cells, self.stride
+        for c in keep:
+            nd = g[c] + 1
+            for j in (c + 1, c - 1, c + W, c - W):
+                if cells[j] != WALL and j not in closed and nd < g.get(j, INF):
+                    g[j] = nd
+                    new_parent[j] = c
+
+        self.root = new_root
+        self.g = g
+        self.parent = new_parent
+        self.closed = closed
+        self.heap = [(d + self._h(j), d, j) for j, d in g.items() if j not in closed]
+        heapq.heapify(self.heap)
+
+    def notify_changed(self, grid, cells: Iterable[Tuple[int, int]], revision: int = 0):
+        # cells whose passability changed: the tree can't be trusted any more
+        for cell in cells:
+            self.cells[self._index(cell)] = grid[cell[1]][cell[0]]
+        self.revision = revision
+        self._reset(self.root)
+
+    def path(self) -> List[Tuple[int, int]]:
+        # same contract as astar(): [start, ..., goal], or [] if unreachable
+        if self.cells[self.goal] == WALL:
+            return []
+        self._expand()
+        if self.goal not in self.closed:
+            return []
+        path = []
+        i = self.goal
+        while i >= 0:
+            path.append(self._cell(i))
+            i = self.parent[i]
+        path.reverse()
+        return path
@@ -0,0 +1,86 @@
+import math
+from typing import List, Tuple
+
+WALL = 1
+
+# octant transforms (xx, xy, yx, yy) mapping scan coordinates onto the map
+_OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+
+class FieldOfView:
+    """Recursive shadowcasting over a w*h map, with a Manhattan range limit.
+
+    compute() fills a reusable visibility mask (bytearray, index y * w + x) and
+    the list of lit indices, so callers can either test cells or just walk the
+    lit set. Walls that bound the view are lit, like los_clear treats them.
+    """
+
+    def __init__(self, w: int, h: int):
+        self.w = w
+        self.h = h
+        self.mask = bytearray(w * h)
+        self.lit: List[int] = []
+
+    def clear(self):
+        mask = self.mask
+        for i in self.lit:
+            mask[i] = 0
+        self.lit = []
+
+    def compute(self, grid, origin: Tuple[int, int], radius: int) -> bytearray:
+        self.clear()
+        w, h = self.w, self.h
+        ox, oy = origin
+        # flat tiles when the grid has them (NavGrid), else a row-major copy
+        tiles = grid.data if hasattr(grid, "data") else b"".join(bytes(row) for row in grid)
+        mask, lit = self.mask, self.lit
+        mask[oy * w + ox] = 1
+        lit.append(oy * w + ox)
+
+        def cast(row, start, end, xx, xy, yx, yy):
+            # scan row `row` of one octant between slopes start..end (start >= end)
+            if start < end:
+                return
+            new_start = start
+            for j in range(row, radius + 1):
+                dy = -j
+                blocked = False
+                # skip straight to the first cell inside the start slope, and past
+                # cells beyond the Manhattan range (anything they shadow is out of range too)
+                first = max(-j, j - radius - 1, math.ceil(start * (dy - 0.5) - 0.5))
+                for dx in range(first, 1):
+                    l_slope = (dx - 0.5) / (dy + 0.5)
+                    r_slope = (dx + 0.5) / (dy - 0.5)
+                    if start < r_slope:
+                        continue
+                    if end > l_slope:
+                        break
+                    x = ox + dx * xx + dy * xy
+                    y = oy + dx * yx + dy * yy
+                    if 0 <= x < w and 0 <= y < h:
+                        i = y * w + x
+                        opaque = tiles[i] == WALL
+                        if -dx - dy <= radius and not mask[i]:
+                            mask[i] = 1
+                            lit.append(i)
+                    else:
+                        opaque = True
+                    if blocked:
+                        if opaque:
+                            new_start = r_slope
+                        else:
+                            blocked = False
+                            start = new_start
+                    elif opaque and j < radius:
+                        blocked = True
+                        cast(j + 1, start, l_slope, xx, xy, yx, yy)
+                        new_start = r_slope
+                if blocked:
+                    break
+
+        for xx, xy, yx, yy in _OCTANTS:
+            cast(1, 1.0, 0.0, xx, xy, yx, yy)
+        return mask
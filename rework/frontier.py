@@ -0,0 +1,97 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from navgrid import NavGrid
+
+WALL = 1
+
+
+class Frontier:
+    """Revealed walkable cells that still border unrevealed ones, by building.
+
+    Given an origin, only cells connected to it count: a revealed room nobody
+    can walk into is not somewhere to explore.
+
+    Fed the newly revealed cells each tick (reveal()). Each building (and the
+    outdoors, -1) keeps a max-heap on the cell's exploration value; values only
+    ever drop (neighbours get revealed, cells get visited), so stale heap
+    entries are re-scored lazily when they surface.
+    """
+
+    def __init__(self, nav: NavGrid, origin: Optional[Tuple[int, int]] = None):
+        self.nav = nav
+        self.origin = origin
+        self.members: Dict[int, int] = {}  # cell index -> zone
+        self.heaps: Dict[int, List[Tuple[float, int]]] = {}
+
+    def score(self, i: int) -> float:
+        # the location part of choose_explore_target's score
+        nav = self.nav
+        x, y = i % nav.w, i // nav.w
+        s = 0.0 if nav.visited.get(x, y) else 2.2
+        s += nav.revealed.unset_nbrs[i] * 0.85
+        if nav.building.data[i] != -1:
+            s += 1.2
+        return s
+
+    def reachable(self, i: int) -> bool:
+        nav = self.nav
+        return self.origin is None or nav.connected(self.origin, (i % nav.w, i // nav.w))
+
+    def _refresh(self, i: int):
+        nav = self.nav
+        inside = (nav.data[i] != WALL and nav.revealed.unset_nbrs[i] > 0 and nav.revealed.get(i % nav.w, i // nav.w)
+                  and self.reachable(i))
+        if inside and i not in self.members:
+            zone = nav.building.data[i]
+            self.members[i] = zone
+            heapq.heappush(self.heaps.setdefault(zone, []), (-self.score(i), i))
+        elif not inside and i in self.members:
+            # its heap entry is dropped when it surfaces
+            del self.members[i]
+
+    def reveal(self, indices):
+        w, n = self.nav.w, len(self.nav.data)
+        for i in indices:
+            self._refresh(i)
+            x = i % w
+            if x > 0:
+                self._refresh(i - 1)
+            if x < w - 1:
+                self._refresh(i + 1)
+            if i >= w:
+                self._refresh(i - w)
+            if i + w < n:
+                self._refresh(i + w)
+
+    def best(self, zone: int, k: int) -> List[Tuple[float, int]]:
+        # the k highest scoring cells of one zone, as (score, index)
+        heap = self.heaps.get(zone)
+        out = []
+        while heap and len(out) < k:
+            neg, i = heapq.heappop(heap)
+            if self.members.get(i) != zone:
+                continue
+            if not self.reachable(i):
+                # cut off by a map edit since it was admitted
+                del self.members[i]
+                continue
+            s = self.score(i)
+            if s < -neg:
+                heapq.heappush(heap, (-s, i))
+                continue
+            out.append((s, i))
+        for s, i in out:
+            heapq.heappush(heap, (-s, i))
+        return out
+
+    def candidates(self, per_zone: int = 4) -> List[Tuple[float, Tuple[int, int]]]:
+        # a few top cells from every zone, in a fixed order
+        w = self.nav.w
+        out = []
+        for zone in sorted(self.heaps):
+            out.extend((s, (i % w, i // w)) for s, i in self.best(zone, per_zone))
+        return out
+
+    def __len__(self):
+        return len(self.members)
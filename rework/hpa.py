@@ -0,0 +1,356 @@
+import heapq
+from collections import deque
+from typing import List, Tuple, Dict, Optional
+
+from pathfinding import find_path, WALL
+
+OUTDOORS = -1
+
+
+class _ClusterField:
+    """Step counts from one abstract node to every cell of its own cluster."""
+
+    def __init__(self, planner: "HierarchicalPlanner", cell: Tuple[int, int]):
+        self.cell = cell
+        x0, y0, x1, y1 = planner.cluster_bounds(cell)
+        self.x0, self.y0, self.cw = x0, y0, x1 - x0
+        self.dist = [-1] * ((x1 - x0) * (y1 - y0))
+
+        open_cell = planner.open_cell
+        dist, cw = self.dist, self.cw
+        dist[(cell[1] - y0) * cw + cell[0] - x0] = 0
+        frontier = deque([cell])
+        while frontier:
+            x, y = frontier.popleft()
+            nd = dist[(y - y0) * cw + x - x0] + 1
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if x0 <= nx < x1 and y0 <= ny < y1 and dist[(ny - y0) * cw + nx - x0] < 0 and open_cell(nx, ny):
+                    dist[(ny - y0) * cw + nx - x0] = nd
+                    frontier.append((nx, ny))
+
+    def distance(self, cell: Tuple[int, int]) -> int:
+        x, y = cell[0] - self.x0, cell[1] - self.y0
+        if 0 <= x < self.cw and 0 <= y < len(self.dist) // self.cw:
+            return self.dist[y * self.cw + x]
+        return -1
+
+    def path_from(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # walk downhill from start to this field's node, staying inside the cluster
+        d = self.distance(start)
+        if d < 0:
+            return []
+        path = [start]
+        x, y = start
+        while d > 0:
+            d -= 1
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if self.distance((nx, ny)) == d:
+                    x, y = nx, ny
+                    break
+            path.append((x, y))
+        return path
+
+
+class HierarchicalPlanner:
+    """Two-level (HPA*) planner over the facility's buildings, doors and open ground.
+
+    generate_facility gives every building a single perimeter door, so any path
+    into or out of a building passes through it: each building is one region whose
+    only entrance is its door, with a flood fill from the door giving the
+    intra-building cost to every interior cell. Everything outside the buildings is
+    cut into square clusters; cells where neighbouring clusters touch become
+    entrance nodes, linked to the other nodes of their cluster by local flood fills.
+    Doors are nodes of that graph too, and door-to-door costs are precomputed.
+
+    All of that is built once per map. Short queries (is_local) are left to the
+    plain grid search; a long one searches only the small abstract graph and refines the concrete path by walking down the stored fields
+    (just the first segment with full=False). Paths are near-optimal rather than
+    exactly shortest, as usual for HPA*.
+    """
+
+    def __init__(self, grid, building_id, buildings, revision: int = 0, cluster_size: int = 12, method: Optional[str] = None):
+        self.grid = grid
+        self.building_id = building_id
+        self.revision = revision
+        self.cluster_size = cluster_size
+        self.method = method
+        self.w, self.h = len(grid[0]), len(grid)
+
+        # buildings: door + intra-building field
+        self.doors: List[Tuple[int, int]] = []
+        self.door_of: Dict[int, int] = {}              # building id -> door index
+        self.door_at: Dict[Tuple[int, int], int] = {}  # door cell -> door index
+        self.interiors: List[Dict[Tuple[int, int], int]] = []
+        for b in buildings:
+            if not self._sealed(b):
+                # something (e.g. a dug corridor) opened a second way in; treat it as open ground
+                continue
+            self.door_of[b.bid] = len(self.doors)
+            self.door_at[b.door] = len(self.doors)
+            self.doors.append(b.door)
+            self.interiors.append(self._interior_field(b))
+
+        # open ground: entrance nodes between clusters, plus the doors
+        self.nodes: List[Tuple[int, int]] = []
+        self.node_at: Dict[Tuple[int, int], int] = {}
+        self.edges: List[List[Tuple[int, int]]] = []
+        self._build_entrances()
+        for door in self.doors:
+            self._node(door)
+        self.fields = [_ClusterField(self, cell) for cell in self.nodes]
+        self.by_cluster: Dict[Tuple[int, int], List[int]] = {}
+        for n, cell in enumerate(self.nodes):
+            self.by_cluster.setdefault(self.cluster_of(cell), []).append(n)
+        for members in self.by_cluster.values():
+            for a in members:
+                for b in members:
+                    d = self.fields[b].distance(self.nodes[a])
+                    if a != b and d > 0:
+                        self.edges[a].append((b, d))
+
+        # door_cost[a][b]: abstract cost from door a to door b (-1 if disconnected)
+        self.door_routes = [self._dijkstra(self.node_at[door]) for door in self.doors]
+        self.door_cost = [[routes[0].get(self.node_at[door], -1) for door in self.doors] for routes in self.door_routes]
+
+    # --------------------------
+    # precomputation
+    # --------------------------
+    def _sealed(self, b) -> bool:
+        r = b.rect
+        x0, y0, x1, y1 = r.x, r.y, r.x + r.w - 1, r.y + r.h - 1
+        perimeter = [(x, y) for x in range(x0, x1 + 1) for y in (y0, y1)]
+        perimeter += [(x, y) for y in range(y0 + 1, y1) for x in (x0, x1)]
+        openings = [c for c in perimeter if self.grid[c[1]][c[0]] != WALL]
+        return openings == [b.door]
+
+    def _interior_field(self, b) -> Dict[Tuple[int, int], int]:
+        dist = {b.door: 0}
+        frontier = deque([b.door])
+        while frontier:
+            x, y = frontier.popleft()
+            for nxt in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if nxt not in dist and self.building_id[nxt[1]][nxt[0]] == b.bid and self.grid[nxt[1]][nxt[0]] != WALL:
+                    dist[nxt] = dist[(x, y)] + 1
+                    frontier.append(nxt)
+        return dist
+
+    def open_cell(self, x: int, y: int) -> bool:
+        # open ground for the cluster graph: passable and not inside a sealed building
+        return self.grid[y][x] != WALL and self.building_id[y][x] not in self.door_of
+
+    def cluster_of(self, cell: Tuple[int, int]) -> Tuple[int, int]:
+        return (cell[0] // self.cluster_size, cell[1] // self.cluster_size)
+
+    def cluster_bounds(self, cell: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        cx, cy = self.cluster_of(cell)
+        c = self.cluster_size
+        return cx * c, cy * c, min(self.w, cx * c + c), min(self.h, cy * c + c)
+
+    def _node(self, cell: Tuple[int, int]) -> int:
+        n = self.node_at.get(cell)
+        if n is None:
+            n = len(self.nodes)
+            self.node_at[cell] = n
+            self.nodes.append(cell)
+            self.edges.append([])
+        return n
+
+    def _link(self, a: Tuple[int, int], b: Tuple[int, int]):
+        na, nb = self._node(a), self._node(b)
+        self.edges[na].append((nb, 1))
+        self.edges[nb].append((na, 1))
+
+    def _add_run(self, run: List[Tuple[Tuple[int, int], Tuple[int, int]]]):
+        # long openings get a transition at each end, short ones one in the middle
+        picks = [run[0], run[-1]] if len(run) >= 6 else [run[len(run) // 2]]
+        for a, b in picks:
+            self._link(a, b)
+
+    def _build_entrances(self):
+        c = self.cluster_size
+        for bx in range(c, self.w, c):
+            run = []
+            for y in range(self.h):
+                if self.open_cell(bx - 1, y) and self.open_cell(bx, y):
+                    run.append(((bx - 1, y), (bx, y)))
+                    if (y + 1) % c and y + 1 < self.h:
+                        continue
+                if run:
+                    self._add_run(run)
+                    run = []
+        for by in range(c, self.h, c):
+            run = []
+            for x in range(self.w):
+                if self.open_cell(x, by - 1) and self.open_cell(x, by):
+                    run.append(((x, by - 1), (x, by)))
+                    if (x + 1) % c and x + 1 < self.w:
+                        continue
+                if run:
+                    self._add_run(run)
+                    run = []
+
+    def _dijkstra(self, source: int):
+        cost = {source: 0}
+        parent = {source: -1}
+        heap = [(0, source)]
+        while heap:
+            d, n = heapq.heappop(heap)
+            if d > cost[n]:
+                continue
+            for m, step in self.edges[n]:
+                nd = d + step
+                if m not in cost or nd < cost[m]:
+                    cost[m] = nd
+                    parent[m] = n
+                    heapq.heappush(heap, (nd, m))
+        return cost, parent
+
+    # --------------------------
+    # queries
+    # --------------------------
+    def is_local(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        # same or neighbouring clusters, or under two clusters apart: a direct search is cheap
+        # there, and exact, where the abstract graph's entrance detours can double a short path
+        (ax, ay), (bx, by) = self.cluster_of(a), self.cluster_of(b)
+        if max(abs(ax - bx), abs(ay - by)) <= 1:
+            return True
+        return abs(a[0] - b[0]) + abs(a[1] - b[1]) < 2 * self.cluster_size
+
+    def region(self, cell: Tuple[int, int]) -> int:
+        # index of the building door owning this cell, or OUTDOORS
+        x, y = cell
+        return self.door_of.get(self.building_id[y][x], OUTDOORS)
+
+    def _abstract_search(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[int]]:
+        # A* over the node graph with start/goal temporarily attached to their clusters' nodes
+        if start in self.door_at and goal in self.door_at:
+            cost, parent = self.door_routes[self.door_at[start]]
+            n = self.node_at[goal]
+            if n not in parent:
+                return None
+            route = []
+            while n >= 0:
+                route.append(n)
+                n = parent[n]
+            route.reverse()
+            return route
+
+        goal_links = {n: self.fields[n].distance(goal) for n in self.by_cluster.get(self.cluster_of(goal), ())}
+        goal_links = {n: d for n, d in goal_links.items() if d >= 0}
+        if not goal_links:
+            return None
+        gx, gy = goal
+        START, GOAL = -1, -2
+
+        heap = []
+        cost = {}
+        parent = {}
+        for n in self.by_cluster.get(self.cluster_of(start), ()):
+            d = self.fields[n].distance(start)
+            if d >= 0:
+                cost[n] = d
+                parent[n] = START
+                x, y = self.nodes[n]
+                heapq.heappush(heap, (d + abs(x - gx) + abs(y - gy), d, n))
+
+        best = None
+        while heap:
+            f, d, n = heapq.heappop(heap)
+            if best is not None and f >= best:
+                break
+            if d > cost[n]:
+                continue
+            if n in goal_links:
+                total = d + goal_links[n]
+                if best is None or total < best:
+                    best = total
+                    parent[GOAL] = n
+            for m, step in self.edges[n]:
+                nd = d + step
+                if m not in cost or nd < cost[m]:
+                    cost[m] = nd
+                    parent[m] = n
+                    x, y = self.nodes[m]
+                    heapq.heappush(heap, (nd + abs(x - gx) + abs(y - gy), nd, m))
+
+        if best is None:
+            return None
+        route = []
+        n = parent[GOAL]
+        while n != START:
+            route.append(n)
+            n = parent[n]
+        route.reverse()
+        return route
+
+    def _refine(self, start: Tuple[int, int], goal: Tuple[int, int], route: List[int], full: bool) -> List[Tuple[int, int]]:
+        path = [start]
+        for n in route:
+            cell = self.nodes[n]
+            if path[-1] != cell:
+                if abs(path[-1][0] - cell[0]) + abs(path[-1][1] - cell[1]) == 1 and self.cluster_of(path[-1]) != self.cluster_of(cell):
+                    path.append(cell)  # inter-cluster edge
+                else:
+                    path += self.fields[n].path_from(path[-1])[1:]
+                if not full:
+                    return path
+        if path[-1] != goal:
+            tail = self.fields[route[-1]].path_from(goal)
+            tail.reverse()
+            path += tail[1:]
+        return path
+
+    def _interior_path(self, door: int, cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # cell -> door inside one building
+        dist = self.interiors[door]
+        if cell not in dist:
+            return []
+        path = [cell]
+        x, y = cell
+        d = dist[cell]
+        while d > 0:
+            d -= 1
+            for nxt in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if dist.get(nxt) == d:
+                    x, y = nxt
+                    break
+            path.append((x, y))
+        return path
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int], full: bool = True) -> List[Tuple[int, int]]:
+        # same contract as astar(); short queries go straight to find_path. With full=False
+        # only the first abstract segment is refined (start -> its building door, or -> first
+        # entrance node) and callers replan when they reach its end
+        rs, rg = self.region(start), self.region(goal)
+        if start == goal or (rs == rg and rs != OUTDOORS) or self.is_local(start, goal):
+            return find_path(self.grid, start, goal, method=self.method)
+
+        path = [start]
+        if rs != OUTDOORS:
+            path = self._interior_path(rs, start)
+            if not path:
+                return []
+            if not full:
+                return path
+        tail = [goal]
+        if rg != OUTDOORS:
+            tail = self._interior_path(rg, goal)
+            if not tail:
+                return []
+            tail.reverse()
+
+        a, b = path[-1], tail[0]
+        if a == b:
+            middle = [a]
+        elif self.cluster_of(a) == self.cluster_of(b):
+            middle = find_path(self.grid, a, b, method=self.method)
+        else:
+            route = self._abstract_search(a, b)
+            if route is None:
+                return []
+            middle = self._refine(a, b, route, full)
+            if not full and middle[-1] != b:
+                return path + middle[1:]
+        if not middle:
+            return []
+        return path + middle[1:] + tail[1:]
@@ -0,0 +1,454 @@
+import itertools
+import math
+import random
+from array import array
+from typing import Dict, List, Tuple, Optional
+
+WALL = 1
+
+# revisions are unique across every NavGrid, so a fresh map never reuses a stale key
+_revisions = itertools.count(1)
+
+
+def bresenham_line(x0, y0, x1, y1):
+    points = []
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx + dy
+    x, y = x0, y0
+    while True:
+        points.append((x, y))
+        if x == x1 and y == y1:
+            break
+        e2 = 2 * err
+        if e2 >= dy:
+            err += dy
+            x += sx
+        if e2 <= dx:
+            err += dx
+            y += sy
+    return points
+
+
+# cells strictly between (0, 0) and every offset up to RAY_RANGE, built once;
+# the cells a Bresenham ray visits depend only on its offset
+RAY_RANGE = 16
+RAY_TEMPLATES = {
+    (dx, dy): tuple(bresenham_line(0, 0, dx, dy)[1:-1])
+    for dy in range(-RAY_RANGE, RAY_RANGE + 1)
+    for dx in range(-RAY_RANGE, RAY_RANGE + 1)
+}
+
+
+# the 8 directions cover can face, counter-clockwise from east (y grows downward)
+DIRECTIONS = ((1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+def direction_index(dx: int, dy: int) -> int:
+    # index into DIRECTIONS of the heading nearest to (dx, dy)
+    d = _SECTORS.get((dx, dy))
+    return d if d is not None else round(math.atan2(-dy, dx) / (math.pi / 4)) % 8
+
+
+_SECTORS = {off: round(math.atan2(-off[1], off[0]) / (math.pi / 4)) % 8 for off in RAY_TEMPLATES}
+
+
+def ray_cells(dx: int, dy: int):
+    # offsets strictly between (0, 0) and (dx, dy) along the Bresenham line
+    ray = RAY_TEMPLATES.get((dx, dy))
+    return ray if ray is not None else bresenham_line(0, 0, dx, dy)[1:-1]
+
+
+class GridLayer:
+    """One w*h layer in a flat typed buffer, still indexable as layer[y][x].
+
+    Rows are memoryviews into the buffer, so reads and writes through
+    layer[y][x] cost the same as a list of lists while the data stays contiguous.
+    """
+
+    def __init__(self, w: int, h: int, data):
+        self.w = w
+        self.h = h
+        self.data = data
+        view = memoryview(data)
+        self.rows = [view[y * w:(y + 1) * w] for y in range(h)]
+
+    def __len__(self):
+        return self.h
+
+    def __getitem__(self, y):
+        return self.rows[y]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def get(self, x: int, y: int):
+        return self.data[y * self.w + x]
+
+    def set(self, x: int, y: int, v):
+        self.data[y * self.w + x] = v
+
+    def fill(self, v: int):
+        if isinstance(self.data, array):
+            self.data[:] = array(self.data.typecode, [v]) * len(self.data)
+        else:
+            self.data[:] = bytes([v]) * len(self.data)
+
+    def count(self, v: int = 1) -> int:
+        return self.data.count(v)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) * (self.data.itemsize if isinstance(self.data, array) else 1)
+
+
+class BitLayer:
+    """A w*h bool layer packed 8 cells to a byte, row by row, with live counters.
+
+    Cells only ever get set during an operation (fog and footsteps are never
+    taken back), so set() keeps the statistics current as it goes: cells set
+    on walkable tiles, per building, and for every cell how many of its
+    in-bounds orthogonal neighbours are still unset.
+    """
+
+    def __init__(self, nav: "NavGrid"):
+        self.nav = nav
+        self.w, self.h = nav.w, nav.h
+        self.stride = (self.w + 7) // 8
+        self.bits = bytearray(self.stride * self.h)
+        self.unset_nbrs = bytearray(self.w * self.h)
+        self.walkable_set = 0
+        self.zone_set: Dict[int, int] = {}
+        self.clear()
+
+    def clear(self):
+        w, h = self.w, self.h
+        self.bits[:] = bytes(len(self.bits))
+        for y in range(h):
+            for x in range(w):
+                self.unset_nbrs[y * w + x] = (x > 0) + (x < w - 1) + (y > 0) + (y < h - 1)
+        self.walkable_set = 0
+        self.zone_set = {}
+
+    def get(self, x: int, y: int) -> int:
+        return self.bits[y * self.stride + (x >> 3)] >> (x & 7) & 1
+
+    def set(self, x: int, y: int) -> bool:
+        # True when the cell was newly set
+        byte = y * self.stride + (x >> 3)
+        bit = 1 << (x & 7)
+        if self.bits[byte] & bit:
+            return False
+        self.bits[byte] |= bit
+        w = self.w
+        i = y * w + x
+        if self.nav.data[i] != WALL:
+            self.walkable_set += 1
+        zone = self.nav.building.data[i]
+        if zone >= 0:
+            self.zone_set[zone] = self.zone_set.get(zone, 0) + 1
+        nbrs = self.unset_nbrs
+        if x > 0:
+            nbrs[i - 1] -= 1
+        if x < w - 1:
+            nbrs[i + 1] -= 1
+        if y > 0:
+            nbrs[i - w] -= 1
+        if y < self.h - 1:
+            nbrs[i + w] -= 1
+        return True
+
+    def set_index(self, i: int) -> bool:
+        return self.set(i % self.w, i // self.w)
+
+    def set_many(self, indices) -> List[int]:
+        # set flat cell indices (y * w + x), returning the newly set ones;
+        # the already-set test is inlined since most are
+        bits, stride, w = self.bits, self.stride, self.w
+        added = []
+        for i in indices:
+            y, x = divmod(i, w)
+            if not bits[y * stride + (x >> 3)] >> (x & 7) & 1:
+                self.set(x, y)
+                added.append(i)
+        return added
+
+    def recount(self):
+        # rebuild the counters from the bits, after the tiles underneath changed
+        if not any(self.bits):
+            return
+        bits = bytes(self.bits)
+        self.clear()
+        for y in range(self.h):
+            row = y * self.stride
+            for x in range(self.w):
+                if bits[row + (x >> 3)] >> (x & 7) & 1:
+                    self.set(x, y)
+
+    def count(self) -> int:
+        return sum(bin(b).count("1") for b in self.bits)
+
+    # --------------------------
+    # statistics (O(1))
+    # --------------------------
+    def coverage(self) -> float:
+        # fraction of walkable cells set
+        total = self.nav.walkable_count()
+        return self.walkable_set / total if total else 0.0
+
+    def zone_coverage(self, zone: int) -> float:
+        # fraction of a building's cells (its interior_cells) set
+        total = self.nav.zone_sizes().get(zone, 0)
+        return self.zone_set.get(zone, 0) / total if total else 0.0
+
+    def unset_neighbours(self, x: int, y: int) -> int:
+        return self.unset_nbrs[y * self.w + x]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+
+class FloorIndex:
+    """Walkable cells off the map border, flat and per building, for random picks.
+
+    pick() rejection-samples a few times against the avoid points, then masks
+    out every cell within the avoid radius and chooses among the rest, so it
+    always terminates even on crowded maps.
+    """
+
+    TRIES = 16
+
+    def __init__(self, nav: "NavGrid"):
+        self.nav = nav
+        w, h = nav.w, nav.h
+        self.cells: List[Tuple[int, int]] = []
+        self.by_zone: Dict[int, List[Tuple[int, int]]] = {}
+        for (x, y) in nav.floor_cells():
+            if 1 <= x <= w - 2 and 1 <= y <= h - 2:
+                self.cells.append((x, y))
+                zone = nav.building.data[y * w + x]
+                if zone >= 0:
+                    self.by_zone.setdefault(zone, []).append((x, y))
+
+    def avoid_mask(self, avoid: List[Tuple[int, int]], radius: int) -> bytearray:
+        # 1 on every cell within Manhattan radius of an avoid point
+        w, h = self.nav.w, self.nav.h
+        mask = bytearray(w * h)
+        for (ax, ay) in avoid:
+            for y in range(max(0, ay - radius), min(h, ay + radius + 1)):
+                span = radius - abs(y - ay)
+                x0, x1 = max(0, ax - span), min(w - 1, ax + span)
+                if x0 <= x1:
+                    mask[y * w + x0:y * w + x1 + 1] = b"\x01" * (x1 - x0 + 1)
+        return mask
+
+    def pick(self, avoid: Optional[List[Tuple[int, int]]] = None, radius: int = 6,
+             zone: Optional[int] = None, rng=random) -> Optional[Tuple[int, int]]:
+        # random cell (of one building, if zone is given) farther than radius from every avoid point;
+        # when nothing qualifies, any cell of the pool
+        pool = self.cells if zone is None else self.by_zone.get(zone, [])
+        if not pool:
+            return None
+        if not avoid:
+            return rng.choice(pool)
+        for _ in range(self.TRIES):
+            x, y = rng.choice(pool)
+            if all(abs(x - ax) + abs(y - ay) > radius for (ax, ay) in avoid):
+                return (x, y)
+        # crowded: mask out the avoid radii once and choose among what's left
+        mask = self.avoid_mask(avoid, radius)
+        w = self.nav.w
+        allowed = [(x, y) for (x, y) in pool if not mask[y * w + x]]
+        return rng.choice(allowed or pool)
+
+    def near(self, center: Tuple[int, int], radius: int, avoid: Optional[List[Tuple[int, int]]] = None,
+             avoid_radius: int = 6) -> List[Tuple[int, int]]:
+        # indexed cells within Manhattan radius of center, minus those near avoid points
+        nav = self.nav
+        w, h = nav.w, nav.h
+        cx, cy = center
+        out = []
+        for y in range(max(1, cy - radius), min(h - 2, cy + radius) + 1):
+            span = radius - abs(y - cy)
+            for x in range(max(1, cx - span), min(w - 2, cx + span) + 1):
+                if nav.data[y * w + x] != WALL and all(abs(x - ax) + abs(y - ay) > avoid_radius for (ax, ay) in avoid or ()):
+                    out.append((x, y))
+        return out
+
+
+class NavGrid(GridLayer):
+    """The map's layers in contiguous arrays.
+
+    The NavGrid itself is the tile layer (uint8: 0 floor, 1 wall, 2 door), so
+    `grid[y][x]` keeps working everywhere. Alongside it:
+      building  int16  building id per cell (-1 outdoors)
+      revealed  bit    fog of war (BitLayer)
+      visited   bit    cells an operative has stood on (BitLayer)
+
+    Tile writes should go through set_tile(), or be followed by mark_dirty(), so
+    the revision counter and dirty region stay correct; anything derived from
+    the tiles (padded copy, cover counts, path caches) is keyed on the revision.
+    """
+
+    def __init__(self, w: int, h: int):
+        super().__init__(w, h, bytearray(w * h))
+        self.building = GridLayer(w, h, array("h", [-1]) * (w * h))
+        self.revision = next(_revisions)
+        self.dirty: Optional[Tuple[int, int, int, int]] = None
+        self._derived = {}
+
+        self.revealed = BitLayer(self)
+        self.visited = BitLayer(self)
+
+    @classmethod
+    def from_lists(cls, grid: List[List[int]], building_id: Optional[List[List[int]]] = None) -> "NavGrid":
+        nav = cls(len(grid[0]), len(grid))
+        nav.data[:] = b"".join(bytes(row) for row in grid)
+        if building_id is not None:
+            nav.building.data[:] = array("h", itertools.chain.from_iterable(building_id))
+        return nav
+
+    # --------------------------
+    # revision / dirty tracking
+    # --------------------------
+    def mark_dirty(self, x0: int = 0, y0: int = 0, x1: Optional[int] = None, y1: Optional[int] = None):
+        # inclusive cell rectangle whose tiles changed (whole map by default)
+        x1 = self.w - 1 if x1 is None else x1
+        y1 = self.h - 1 if y1 is None else y1
+        if self.dirty is not None:
+            dx0, dy0, dx1, dy1 = self.dirty
+            x0, y0, x1, y1 = min(x0, dx0), min(y0, dy0), max(x1, dx1), max(y1, dy1)
+        self.dirty = (x0, y0, x1, y1)
+        self.revision = next(_revisions)
+        self._derived = {}
+        self.revealed.recount()
+        self.visited.recount()
+
+    def take_dirty(self) -> Optional[Tuple[int, int, int, int]]:
+        dirty, self.dirty = self.dirty, None
+        return dirty
+
+    def set_tile(self, x: int, y: int, v: int):
+        if self.data[y * self.w + x] != v:
+            self.data[y * self.w + x] = v
+            self.mark_dirty(x, y, x, y)
+
+    def _cached(self, name, build):
+        value = self._derived.get(name)
+        if value is None:
+            value = self._derived[name] = build()
+        return value
+
+    # --------------------------
+    # whole-map operations
+    # --------------------------
+    def padded_cells(self) -> bytes:
+        # tiles with a one-cell wall border, the layout the path searches scan
+        def build():
+            W = self.w + 2
+            wall = bytes([WALL])
+            body = b"".join(wall + self.data[y * self.w:(y + 1) * self.w] + wall for y in range(self.h))
+            return wall * W + body + wall * W
+        return self._cached("padded", build)
+
+    def passable_mask(self) -> bytes:
+        # 1 where walkable, 0 on walls
+        table = bytes(0 if v == WALL else 1 for v in range(256))
+        return self._cached("passable", lambda: bytes(self.data).translate(table))
+
+    def floor_cells(self) -> List[Tuple[int, int]]:
+        w = self.w
+        return [(i % w, i // w) for i in itertools.compress(range(len(self.data)), self.passable_mask())]
+
+    def components(self) -> array:
+        # connected region id per cell (4-neighbour moves over walkable tiles), -1 on walls
+        def build():
+            w, n = self.w, len(self.data)
+            passable = self.passable_mask()
+            label = array("i", [-1]) * n
+            region = 0
+            for seed in range(n):
+                if not passable[seed] or label[seed] >= 0:
+                    continue
+                label[seed] = region
+                stack = [seed]
+                while stack:
+                    i = stack.pop()
+                    x = i % w
+                    for j in (i - 1 if x > 0 else -1, i + 1 if x < w - 1 else -1, i - w, i + w):
+                        if 0 <= j < n and passable[j] and label[j] < 0:
+                            label[j] = region
+                            stack.append(j)
+                region += 1
+            return label
+        return self._cached("components", build)
+
+    def connected(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        comp = self.components()
+        ca = comp[a[1] * self.w + a[0]]
+        return ca >= 0 and ca == comp[b[1] * self.w + b[0]]
+
+    def floor_index(self) -> FloorIndex:
+        return self._cached("floor_index", lambda: FloorIndex(self))
+
+    def walkable_count(self) -> int:
+        return self._cached("walkable", lambda: self.passable_mask().count(1))
+
+    def zone_sizes(self) -> Dict[int, int]:
+        # cells per building id, i.e. len(Building.interior_cells)
+        def build():
+            sizes = {}
+            for b in self.building.data:
+                if b >= 0:
+                    sizes[b] = sizes.get(b, 0) + 1
+            return sizes
+        return self._cached("zones", build)
+
+    def cover_counts(self) -> bytes:
+        # number of orthogonally adjacent walls per cell (0..4), off-map counts as open
+        def build():
+            w, h = self.w, self.h
+            W = w + 2
+            table = bytes(1 if v == WALL else 0 for v in range(256))
+            walls = bytes(self.data).translate(table)
+            zero = bytes(1)
+            padded = bytes(W) + b"".join(zero + walls[y * w:(y + 1) * w] + zero for y in range(h)) + bytes(W)
+            n = int.from_bytes(padded, "big")
+            # each byte holds at most 4, so the byte lanes never carry into each other
+            total = (n << 8) + (n >> 8) + (n << (8 * W)) + (n >> (8 * W))
+            summed = (total & ((1 << (8 * len(padded))) - 1)).to_bytes(len(padded), "big")
+            return b"".join(summed[(y + 1) * W + 1:(y + 1) * W + 1 + w] for y in range(h))
+        return self._cached("cover", build)
+
+    def directional_cover(self) -> bytes:
+        # per cell and incoming direction (index (y * w + x) * 8 + d): orthogonal walls on the
+        # shooter's side, i.e. not facing away from DIRECTIONS[d] (0..3), off-map open. Head-on
+        # this is cover_counts() minus the wall behind the cell.
+        def build():
+            w, h, data = self.w, self.h, self.data
+            out = bytearray(w * h * 8)
+            for y in range(h):
+                for x in range(w):
+                    walls = [0 <= x + dx < w and 0 <= y + dy < h and data[(y + dy) * w + x + dx] == WALL
+                             for (dx, dy) in DIRECTIONS]
+                    base = (y * w + x) * 8
+                    for d in range(8):
+                        if d % 2:
+                            out[base + d] = walls[d - 1] + walls[(d + 1) % 8]
+                        else:
+                            out[base + d] = walls[d - 2] + walls[d] + walls[(d + 2) % 8]
+            return bytes(out)
+        return self._cached("directional_cover", build)
+
+    def cover_from(self, x: int, y: int, sx: int, sy: int) -> int:
+        # directional cover at (x, y) against a shooter at (sx, sy)
+        if (sx, sy) == (x, y):
+            return 0
+        return self.directional_cover()[(y * self.w + x) * 8 + direction_index(sx - x, sy - y)]
+
+    @property
+    def nbytes(self) -> int:
+        return super().nbytes + self.building.nbytes + self.revealed.nbytes + self.visited.nbytes
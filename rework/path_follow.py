@@ -0,0 +1,113 @@
+import itertools
+from array import array
+from typing import List, Tuple, Optional, Iterator
+
+from navgrid import bresenham_line
+
+WALL = 1
+
+# longest leg string-pulling will create; keeps the LOS checks (and any error
+# from a stale path crossing newly changed tiles) bounded
+MAX_LEG = 16
+
+
+def _walkable_line(grid, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+    # every cell on the line passable, and no squeezing diagonally between two walls' corners
+    px, py = a
+    for (x, y) in bresenham_line(a[0], a[1], b[0], b[1]):
+        if grid[y][x] == WALL:
+            return False
+        if x != px and y != py and (grid[py][x] == WALL or grid[y][px] == WALL):
+            return False
+        px, py = x, y
+    return True
+
+
+def straight_runs(cells: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    # lossless: keep only the cells where the direction changes
+    if len(cells) < 3:
+        return list(cells)
+    out = [cells[0]]
+    for k in range(1, len(cells) - 1):
+        (ax, ay), (bx, by), (cx, cy) = cells[k - 1], cells[k], cells[k + 1]
+        if (bx - ax, by - ay) != (cx - bx, cy - by):
+            out.append(cells[k])
+    out.append(cells[-1])
+    return out
+
+
+def string_pull(grid, cells: List[Tuple[int, int]], max_leg: int = MAX_LEG) -> List[Tuple[int, int]]:
+    # greedy LOS smoothing: from each anchor, skip ahead while the straight line stays walkable
+    if len(cells) < 3:
+        return list(cells)
+    out = [cells[0]]
+    anchor = 0
+    for k in range(1, len(cells) - 1):
+        if k + 1 - anchor > max_leg or not _walkable_line(grid, cells[anchor], cells[k + 1]):
+            out.append(cells[k])
+            anchor = k
+    out.append(cells[-1])
+    return out
+
+
+class Path:
+    """A path as packed waypoints consumed through a cursor.
+
+    Built from a cell path whose first cell is where the walker stands. Straight
+    runs are stored as their end points only (or, given a grid, LOS-smoothed into
+    longer legs); the cells of the current leg are walked as a Bresenham line.
+    """
+
+    __slots__ = ("points", "i", "leg", "j")
+
+    def __init__(self, cells: List[Tuple[int, int]] = (), grid=None):
+        wps = string_pull(grid, cells) if grid is not None else straight_runs(cells)
+        self.points = array("h", itertools.chain.from_iterable(wps))
+        self.i = 1  # next waypoint; waypoint 0 is the start cell
+        self.leg: Optional[List[Tuple[int, int]]] = None
+        self.j = 0
+
+    def _waypoint(self, k: int) -> Tuple[int, int]:
+        return self.points[2 * k], self.points[2 * k + 1]
+
+    def _load_leg(self):
+        (ax, ay), (bx, by) = self._waypoint(self.i - 1), self._waypoint(self.i)
+        self.leg = bresenham_line(ax, ay, bx, by)
+        self.j = 1
+
+    def __bool__(self):
+        return self.i < len(self.points) // 2
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        # remaining cells, in walking order
+        if not self:
+            return
+        if self.leg is None:
+            self._load_leg()
+        yield from self.leg[self.j:]
+        for k in range(self.i + 1, len(self.points) // 2):
+            (ax, ay), (bx, by) = self._waypoint(k - 1), self._waypoint(k)
+            yield from bresenham_line(ax, ay, bx, by)[1:]
+
+    def peek(self) -> Tuple[int, int]:
+        # next cell to step onto
+        if self.leg is None:
+            self._load_leg()
+        return self.leg[self.j]
+
+    def advance(self):
+        if self.leg is None:
+            self._load_leg()
+        self.j += 1
+        if self.j >= len(self.leg):
+            self.leg = None
+            self.i += 1
+
+    @property
+    def goal(self) -> Optional[Tuple[int, int]]:
+        n = len(self.points) // 2
+        return self._waypoint(n - 1) if n > 1 else None
+
+    @property
+    def waypoints(self) -> int:
+        return max(0, len(self.points) // 2 - 1)
@@ -0,0 +1,153 @@
+import time
+from collections import deque
+from typing import List, Tuple, Optional, Callable
+
+from pathfinding import IncrementalAStar
+
+
+class PathRequest:
+    """One queued search. The owner keeps its old path until `done` is set."""
+
+    def __init__(self, grid, start: Tuple[int, int], goal: Tuple[int, int], tick: int):
+        self.start = start
+        self.goal = goal
+        self.search = IncrementalAStar(grid, start, goal)
+        self.submitted = time.perf_counter()
+        self.submitted_tick = tick
+        self.latency = 0.0
+        self.latency_ticks = 0
+        self.cancelled = False
+
+    @property
+    def done(self) -> bool:
+        return self.search.done
+
+    @property
+    def path(self) -> Optional[List[Tuple[int, int]]]:
+        return self.search.path
+
+    def path_from(self, cell: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        # the result re-based on where the owner is now; None if it has wandered off the path
+        path = self.path
+        if not path:
+            return path
+        if cell == self.start:
+            return path
+        try:
+            return path[path.index(cell):]
+        except ValueError:
+            return None
+
+
+class PathRequestQueue:
+    """FIFO of pathfinding requests worked off under a per-tick budget.
+
+    process() is called once per simulation tick; it spends at most `budget_us`
+    microseconds expanding the oldest searches and carries half-finished ones
+    over to the next tick, so many entities replanning at once can't stall a frame.
+    With `budget_nodes` the budget is that many node expansions instead, so when
+    a path arrives doesn't depend on the machine and a seeded run replays exactly.
+    """
+
+    def __init__(self, budget_us: int = 1500, on_complete: Optional[Callable[[PathRequest], None]] = None,
+                 budget_nodes: Optional[int] = None):
+        self.budget_us = budget_us
+        self.budget_nodes = budget_nodes
+        self.on_complete = on_complete
+        self.pending: deque = deque()
+        self.tick = 0
+
+        # instrumentation
+        self.submitted = 0
+        self.completed = 0
+        self.expanded = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.max_latency_ticks = 0
+        self.max_depth = 0
+        self.last_tick_us = 0.0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def submit(self, grid, start: Tuple[int, int], goal: Tuple[int, int]) -> PathRequest:
+        req = PathRequest(grid, start, goal, self.tick)
+        self.submitted += 1
+        if req.done:
+            self._complete(req)
+        else:
+            self.pending.append(req)
+            self.max_depth = max(self.max_depth, len(self.pending))
+        return req
+
+    def cancel(self, req: Optional[PathRequest]):
+        if req is not None and not req.done:
+            req.cancelled = True
+
+    def clear(self):
+        self.pending.clear()
+
+    def _complete(self, req: PathRequest):
+        req.latency = time.perf_counter() - req.submitted
+        req.latency_ticks = self.tick - req.submitted_tick
+        self.completed += 1
+        self.expanded += req.search.expanded
+        self.total_latency += req.latency
+        self.max_latency = max(self.max_latency, req.latency)
+        self.max_latency_ticks = max(self.max_latency_ticks, req.latency_ticks)
+        if self.on_complete:
+            self.on_complete(req)
+
+    @property
+    def deterministic(self) -> bool:
+        return self.budget_nodes is not None
+
+    def process(self):
+        self.tick += 1
+        t0 = time.perf_counter()
+        if self.budget_nodes is not None:
+            self._process_nodes()
+        else:
+            self._process_timed(t0 + self.budget_us / 1e6)
+        self.last_tick_us = (time.perf_counter() - t0) * 1e6
+
+    def _process_nodes(self):
+        left = self.budget_nodes
+        while self.pending and left > 0:
+            req = self.pending[0]
+            if req.cancelled:
+                self.pending.popleft()
+                continue
+            before = req.search.expanded
+            finished = req.search.step(max_nodes=left)
+            left -= req.search.expanded - before
+            if not finished:
+                break
+            self.pending.popleft()
+            self._complete(req)
+
+    def _process_timed(self, deadline: float):
+        while self.pending:
+            req = self.pending[0]
+            if req.cancelled:
+                self.pending.popleft()
+                continue
+            if not req.search.step(deadline):
+                break
+            self.pending.popleft()
+            self._complete(req)
+            if time.perf_counter() >= deadline:
+                break
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self.pending),
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "expanded": self.expanded,
+            "avg_latency_ms": 1000.0 * self.total_latency / self.completed if self.completed else 0.0,
+            "max_latency_ms": 1000.0 * self.max_latency,
+            "max_latency_ticks": self.max_latency_ticks,
+            "last_tick_us": self.last_tick_us,
+        }
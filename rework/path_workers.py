@@ -0,0 +1,167 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Tuple, Optional
+
+from pathfinding import find_path
+from path_queue import PathRequest
+
+
+class GridSnapshot:
+    """Read-only copy of the grid that workers index as snapshot[y][x]."""
+
+    def __init__(self, data, w: int, h: int, revision: int):
+        self.data = data
+        self.w = w
+        self.h = h
+        self.revision = revision
+        self.rows = [data[y * w:(y + 1) * w] for y in range(h)]
+
+    def __len__(self):
+        return self.h
+
+    def __getitem__(self, y):
+        return self.rows[y]
+
+
+# ==========================
+# Worker side
+# ==========================
+# process workers attach to the shared snapshot once and reuse it for every request
+_attached = {}
+
+
+def _attach(name: str, w: int, h: int, revision: int) -> GridSnapshot:
+    snap = _attached.get(name)
+    if snap is None:
+        for old_shm, _ in _attached.values():
+            old_shm.close()
+        _attached.clear()
+        shm = shared_memory.SharedMemory(name=name)
+        snap = (shm, GridSnapshot(bytes(shm.buf[:w * h]), w, h, revision))
+        _attached[name] = snap
+    return snap[1]
+
+
+def _solve_shared(name: str, w: int, h: int, revision: int, start, goal, method):
+    return find_path(_attach(name, w, h, revision), start, goal, method=method)
+
+
+def _solve_local(snapshot: GridSnapshot, start, goal, method):
+    return find_path(snapshot, start, goal, method=method)
+
+
+# ==========================
+# Main-loop side
+# ==========================
+class PooledPathRequest(PathRequest):
+    """A search running on a worker; same interface as a queued PathRequest."""
+
+    def __init__(self, future: Future, start: Tuple[int, int], goal: Tuple[int, int], revision: int):
+        self.future = future
+        self.start = start
+        self.goal = goal
+        self.revision = revision
+        self.submitted = time.perf_counter()
+        self.latency = 0.0
+        self.cancelled = False
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def path(self) -> Optional[List[Tuple[int, int]]]:
+        if not self.future.done():
+            return None
+        if self.future.cancelled() or self.future.exception() is not None:
+            return []
+        return self.future.result()
+
+
+class PathWorkerPool:
+    """Runs path searches on a thread or process pool against a shared grid snapshot.
+
+    The snapshot is taken once per grid revision. Thread workers share it by
+    reference; process workers map one shared-memory block, so requests only
+    carry (start, goal) instead of re-pickling the grid. Results arrive as
+    futures that entities adopt on a later tick.
+    """
+
+    def __init__(self, workers: Optional[int] = None, mode: str = "process", method: Optional[str] = None):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"unknown worker mode: {mode}")
+        self.mode = mode
+        self.method = method
+        if mode == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.snapshot: Optional[GridSnapshot] = None
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self.in_flight: List[PooledPathRequest] = []
+
+        # instrumentation
+        self.submitted = 0
+        self.completed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def set_grid(self, grid, revision: int):
+        if self.snapshot is not None and self.snapshot.revision == revision:
+            return
+        w, h = len(grid[0]), len(grid)
+        data = b"".join(bytes(row) for row in grid)
+        if self.mode == "process":
+            self._release_shm()
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+            self.shm.buf[:len(data)] = data
+        self.snapshot = GridSnapshot(data, w, h, revision)
+
+    def submit(self, start: Tuple[int, int], goal: Tuple[int, int]) -> PooledPathRequest:
+        snap = self.snapshot
+        if self.mode == "process":
+            future = self.executor.submit(_solve_shared, self.shm.name, snap.w, snap.h, snap.revision, start, goal, self.method)
+        else:
+            future = self.executor.submit(_solve_local, snap, start, goal, self.method)
+        req = PooledPathRequest(future, start, goal, snap.revision)
+        self.in_flight.append(req)
+        self.submitted += 1
+        return req
+
+    def cancel(self, req: Optional[PathRequest]):
+        if isinstance(req, PooledPathRequest):
+            req.cancelled = True
+            req.future.cancel()
+
+    def collect(self) -> List[PooledPathRequest]:
+        # finished requests since the last call (main thread only)
+        finished = [r for r in self.in_flight if r.done]
+        if finished:
+            self.in_flight = [r for r in self.in_flight if not r.done]
+        now = time.perf_counter()
+        for r in finished:
+            r.latency = now - r.submitted
+            self.completed += 1
+            self.total_latency += r.latency
+            self.max_latency = max(self.max_latency, r.latency)
+        return finished
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self.in_flight),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "avg_latency_ms": 1000.0 * self.total_latency / self.completed if self.completed else 0.0,
+            "max_latency_ms": 1000.0 * self.max_latency,
+        }
+
+    def _release_shm(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self._release_shm()
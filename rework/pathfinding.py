@@ -0,0 +1,544 @@
+import heapq
+import time
+from collections import deque, OrderedDict
+from typing import List, Tuple, Dict, Optional
+
+from navgrid import NavGrid
+
+# grid encoding shared by every search here: 0 floor, 1 wall, 2 door (passable)
+WALL = 1
+
+
+def _h(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def _count(stats: Optional[dict], key: str, n: int = 1):
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + n
+
+
+# ==========================
+# A*
+# ==========================
+def astar(grid, start: Tuple[int, int], goal: Tuple[int, int], stats: Optional[dict] = None) -> List[Tuple[int, int]]:
+    # grid: 1=wall, 0=floor, 2=door (passable)
+    w, h = len(grid[0]), len(grid)
+
+    def in_bounds(p):
+        return 0 <= p[0] < w and 0 <= p[1] < h
+
+    def passable(p):
+        return grid[p[1]][p[0]] != WALL
+
+    if start == goal:
+        return [start]
+    if not in_bounds(goal) or not passable(goal):
+        return []
+
+    open_heap = []
+    heapq.heappush(open_heap, (0, start))
+    came_from: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start: None}
+    gscore = {start: 0}
+
+    while open_heap:
+        _, current = heapq.heappop(open_heap)
+        _count(stats, "expanded")
+        if current == goal:
+            break
+
+        x, y = current
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            nxt = (nx, ny)
+            if not in_bounds(nxt) or not passable(nxt):
+                continue
+            tentative = gscore[current] + 1
+            if nxt not in gscore or tentative < gscore[nxt]:
+                gscore[nxt] = tentative
+                priority = tentative + _h(nxt, goal)
+                heapq.heappush(open_heap, (priority, nxt))
+                came_from[nxt] = current
+
+    if goal not in came_from:
+        return []
+
+    path = []
+    cur = goal
+    while cur is not None:
+        path.append(cur)
+        cur = came_from[cur]
+    path.reverse()
+    return path
+
+
+class IncrementalAStar:
+    """The astar() search split into resumable slices.
+
+    step() expands nodes until the search finishes, a perf_counter deadline
+    passes or a node budget runs out, keeping the open list between calls so a
+    long search can be spread over several frames. `path` follows the astar() contract once `done`.
+    """
+
+    def __init__(self, grid, start: Tuple[int, int], goal: Tuple[int, int]):
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+        self.w, self.h = len(grid[0]), len(grid)
+        self.expanded = 0
+        self.done = False
+        self.path: Optional[List[Tuple[int, int]]] = None
+
+        self.open_heap = [(0, start)]
+        self.came_from: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start: None}
+        self.gscore = {start: 0}
+
+        if start == goal:
+            self._finish([start])
+        elif not (0 <= goal[0] < self.w and 0 <= goal[1] < self.h) or grid[goal[1]][goal[0]] == WALL:
+            self._finish([])
+
+    def _finish(self, path: List[Tuple[int, int]]):
+        self.done = True
+        self.path = path
+        self.open_heap = []
+        self.came_from = {}
+        self.gscore = {}
+
+    def step(self, deadline: Optional[float] = None, max_nodes: Optional[int] = None) -> bool:
+        # returns True once the search has finished
+        if self.done:
+            return True
+        grid, w, h, goal = self.grid, self.w, self.h, self.goal
+        open_heap, came_from, gscore = self.open_heap, self.came_from, self.gscore
+        n = 0
+        while open_heap:
+            if n == max_nodes:
+                self.expanded += n
+                return False
+            _, current = heapq.heappop(open_heap)
+            n += 1
+            if current == goal:
+                break
+            x, y = current
+            for nxt in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                nx, ny = nxt
+                if not (0 <= nx < w and 0 <= ny < h) or grid[ny][nx] == WALL:
+                    continue
+                tentative = gscore[current] + 1
+                if nxt not in gscore or tentative < gscore[nxt]:
+                    gscore[nxt] = tentative
+                    heapq.heappush(open_heap, (tentative + _h(nxt, goal), nxt))
+                    came_from[nxt] = current
+            # checking the clock every node would cost more than the nodes themselves
+            if deadline is not None and n & 15 == 0 and time.perf_counter() >= deadline:
+                self.expanded += n
+                return False
+        self.expanded += n
+
+        if goal not in came_from:
+            self._finish([])
+            return True
+        path = []
+        cur = goal
+        while cur is not None:
+            path.append(cur)
+            cur = came_from[cur]
+        path.reverse()
+        self._finish(path)
+        return True
+
+
+# ==========================
+# Jump Point Search (4-connected)
+# ==========================
+def _padded_cells(grid):
+    # flat bytes copy of the grid with a one-cell wall border, so scans need no bounds checks
+    if isinstance(grid, NavGrid):
+        return grid.padded_cells()
+    w = len(grid[0])
+    border = bytes([WALL]) * (w + 2)
+    wall = bytes([WALL])
+    return border + b"".join(wall + bytes(row) + wall for row in grid) + border
+
+
+def jps(grid, start: Tuple[int, int], goal: Tuple[int, int], stats: Optional[dict] = None) -> List[Tuple[int, int]]:
+    # Same contract as astar: full cell-by-cell path from start to goal, [] if unreachable.
+    # On a uniform-cost 4-connected grid only "jump points" (cells with forced
+    # neighbours, or cells from which a horizontal scan reaches one) go on the heap.
+    w, h = len(grid[0]), len(grid)
+    if start == goal:
+        return [start]
+    if not (0 <= goal[0] < w and 0 <= goal[1] < h) or grid[goal[1]][goal[0]] == WALL:
+        return []
+
+    cells = _padded_cells(grid)
+    W = w + 2
+    start_i = (start[1] + 1) * W + start[0] + 1
+    goal_i = (goal[1] + 1) * W + goal[0] + 1
+    gx, gy = goal
+
+    # scans repeat a lot (every vertical step runs two horizontal ones), and a scan
+    # gives the same answer from every cell it passes, so remember it for all of them
+    h_memo: Dict[int, int] = {}
+
+    def jump_h(i, d):
+        key = i * 2 + (d > 0)
+        found = h_memo.get(key)
+        if found is not None:
+            return found
+        passed = [key]
+        while True:
+            i += d
+            if cells[i] == WALL:
+                found = -1
+                break
+            if i == goal_i:
+                found = i
+                break
+            if (cells[i - W] != WALL and cells[i - d - W] == WALL) or (cells[i + W] != WALL and cells[i - d + W] == WALL):
+                found = i
+                break
+            passed.append(i * 2 + (d > 0))
+        for k in passed:
+            h_memo[k] = found
+        return found
+
+    v_memo: Dict[int, int] = {}
+
+    def jump_v(i, d):
+        key = i * 2 + (d > 0)
+        found = v_memo.get(key)
+        if found is not None:
+            return found
+        passed = [key]
+        while True:
+            i += d
+            if cells[i] == WALL:
+                found = -1
+                break
+            if i == goal_i:
+                found = i
+                break
+            if (cells[i - 1] != WALL and cells[i - 1 - d] == WALL) or (cells[i + 1] != WALL and cells[i + 1 - d] == WALL):
+                found = i
+                break
+            # moving vertically we must stop wherever a horizontal scan would find something
+            if jump_h(i, 1) >= 0 or jump_h(i, -1) >= 0:
+                found = i
+                break
+            passed.append(i * 2 + (d > 0))
+        for k in passed:
+            v_memo[k] = found
+        return found
+
+    open_heap = [(abs(start[0] - gx) + abs(start[1] - gy), 0, start_i, 0)]
+    came_from: Dict[int, int] = {start_i: -1}
+    gscore = {start_i: 0}
+    closed = set()
+    expanded = 0
+
+    while open_heap:
+        _, g, current, d = heapq.heappop(open_heap)
+        if current in closed:
+            continue
+        closed.add(current)
+        expanded += 1
+        if current == goal_i:
+            break
+
+        if d == 1 or d == -1:
+            dirs = (d, W, -W)
+        elif d != 0:
+            dirs = (d, 1, -1)
+        else:
+            dirs = (1, -1, W, -W)
+
+        for nd in dirs:
+            jp = jump_h(current, nd) if (nd == 1 or nd == -1) else jump_v(current, nd)
+            if jp < 0 or jp in closed:
+                continue
+            y, x = divmod(jp, W)
+            steps = abs(jp - current) if (nd == 1 or nd == -1) else abs(jp - current) // W
+            tentative = g + steps
+            if jp not in gscore or tentative < gscore[jp]:
+                gscore[jp] = tentative
+                came_from[jp] = current
+                heapq.heappush(open_heap, (tentative + abs(x - 1 - gx) + abs(y - 1 - gy), tentative, jp, nd))
+
+    _count(stats, "expanded", expanded)
+    if goal_i not in came_from:
+        return []
+
+    # expand the straight segments between jump points back into cells
+    points = []
+    cur = goal_i
+    while cur >= 0:
+        points.append(cur)
+        cur = came_from[cur]
+    points.reverse()
+
+    path = [start]
+    for a, b in zip(points, points[1:]):
+        step = (1 if b > a else -1) if abs(b - a) < W else (W if b > a else -W)
+        for i in range(a + step, b + step, step):
+            y, x = divmod(i, W)
+            path.append((x - 1, y - 1))
+    return path
+
+
+# ==========================
+# Goal distance fields (Dijkstra maps)
+# ==========================
+class DistanceField:
+    """Breadth-first step counts from every reachable cell to a single goal.
+
+    Built once with a flood fill from the goal; afterwards any number of entities
+    can read their next step toward the goal in O(1).
+    """
+
+    def __init__(self, grid, goal: Tuple[int, int], revision: int = 0):
+        self.goal = goal
+        self.revision = revision
+        self.w, self.h = len(grid[0]), len(grid)
+        # stored with a one-cell border (like _padded_cells) so walks need no bounds checks
+        W = self.w + 2
+        self.stride = W
+        self.dist: List[int] = [-1] * (W * (self.h + 2))
+
+        gx, gy = goal
+        if not (0 <= gx < self.w and 0 <= gy < self.h) or grid[gy][gx] == WALL:
+            return
+
+        cells = _padded_cells(grid)
+        dist = self.dist
+        gi = (gy + 1) * W + gx + 1
+        dist[gi] = 0
+        frontier = deque([gi])
+        while frontier:
+            i = frontier.popleft()
+            nd = dist[i] + 1
+            for j in (i + 1, i - 1, i + W, i - W):
+                if dist[j] < 0 and cells[j] != WALL:
+                    dist[j] = nd
+                    frontier.append(j)
+
+    def distance(self, cell: Tuple[int, int]) -> int:
+        # -1 when the cell can't reach the goal
+        x, y = cell
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            return -1
+        return self.dist[(y + 1) * self.stride + x + 1]
+
+    def next_step(self, cell: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        d = self.distance(cell)
+        if d <= 0:
+            return None
+        x, y = cell
+        for nxt in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if self.distance(nxt) == d - 1:
+                return nxt
+        return None
+
+    def path_from(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # same shape as astar(): [start, ..., goal], or [] if unreachable
+        d = self.distance(start)
+        if d < 0:
+            return []
+        W, dist = self.stride, self.dist
+        i = (start[1] + 1) * W + start[0] + 1
+        path = [start]
+        while d > 0:
+            d -= 1
+            if dist[i + 1] == d:
+                i += 1
+            elif dist[i - 1] == d:
+                i -= 1
+            elif dist[i + W] == d:
+                i += W
+            else:
+                i -= W
+            path.append((i % W - 1, i // W - 1))
+        return path
+
+
+# ==========================
+# Flee / influence map
+# ==========================
+# how strongly distance from the threats is preferred over the shortest way out;
+# above 1 so fleeing rounds corners toward open ground instead of into dead ends
+FLEE_COEFFICIENT = 1.2
+
+
+class FleeMap:
+    """Safety field around a set of threats (living operatives).
+
+    A multi-source flood fill gives each cell's step distance to the nearest
+    threat; that is scaled by -FLEE_COEFFICIENT and relaxed again (every cell
+    at most one more than its best neighbour), so walking downhill leads away
+    from the threats and out of corners. Lower is safer.
+    """
+
+    def __init__(self, grid, sources: List[Tuple[int, int]], revision: int = 0):
+        self.sources = tuple(sources)
+        self.revision = revision
+        self.w, self.h = len(grid[0]), len(grid)
+        W = self.w + 2
+        self.stride = W
+        cells = _padded_cells(grid)
+        n = W * (self.h + 2)
+
+        dist = [-1] * n
+        frontier = deque()
+        for (x, y) in sources:
+            if 0 <= x < self.w and 0 <= y < self.h:
+                i = (y + 1) * W + x + 1
+                if cells[i] != WALL and dist[i] < 0:
+                    dist[i] = 0
+                    frontier.append(i)
+        while frontier:
+            i = frontier.popleft()
+            nd = dist[i] + 1
+            for j in (i + 1, i - 1, i + W, i - W):
+                if dist[j] < 0 and cells[j] != WALL:
+                    dist[j] = nd
+                    frontier.append(j)
+
+        # None marks walls and cells the threats can't reach (nothing to flee from there)
+        safety: List[Optional[float]] = [None] * n
+        heap = []
+        for i, d in enumerate(dist):
+            if d >= 0:
+                safety[i] = -FLEE_COEFFICIENT * d
+                heap.append((safety[i], i))
+        heapq.heapify(heap)
+        while heap:
+            s, i = heapq.heappop(heap)
+            if s > safety[i]:
+                continue
+            for j in (i + 1, i - 1, i + W, i - W):
+                if safety[j] is not None and s + 1 < safety[j]:
+                    safety[j] = s + 1
+                    heapq.heappush(heap, (s + 1, j))
+        self.safety = safety
+
+    def value(self, cell: Tuple[int, int]) -> Optional[float]:
+        x, y = cell
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            return None
+        return self.safety[(y + 1) * self.stride + x + 1]
+
+    def flee_path(self, start: Tuple[int, int], steps: int) -> List[Tuple[int, int]]:
+        # [start, ...] walking downhill for up to `steps` cells; [start] at a local minimum
+        path = [start]
+        W, safety = self.stride, self.safety
+        i = (start[1] + 1) * W + start[0] + 1
+        if safety[i] is None:
+            return path
+        for _ in range(steps):
+            best = i
+            for j in (i + 1, i - 1, i + W, i - W):
+                if safety[j] is not None and safety[j] < safety[best]:
+                    best = j
+            if best == i:
+                break
+            i = best
+            path.append((i % W - 1, i // W - 1))
+        return path
+
+
+# ==========================
+# Path cache
+# ==========================
+class PathCache:
+    """Bounded LRU cache of search results keyed on (start, goal, grid revision).
+
+    A miss on the exact key can still be answered by any cached path to the same
+    goal that passes through the start cell: the rest of a shortest path is itself
+    a shortest path.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.entries: "OrderedDict[tuple, Tuple[tuple, Dict[Tuple[int, int], int]]]" = OrderedDict()
+        self.by_goal: Dict[tuple, Dict[tuple, None]] = {}
+
+        self.hits = 0
+        self.subpath_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, start: Tuple[int, int], goal: Tuple[int, int], revision: int) -> Optional[List[Tuple[int, int]]]:
+        key = (start, goal, revision)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+        for other in self.by_goal.get((goal, revision), ()):
+            path, index = self.entries[other]
+            i = index.get(start)
+            if i is not None:
+                self.entries.move_to_end(other)
+                self.hits += 1
+                self.subpath_hits += 1
+                return list(path[i:])
+
+        self.misses += 1
+        return None
+
+    def put(self, start: Tuple[int, int], goal: Tuple[int, int], revision: int, path: List[Tuple[int, int]]):
+        key = (start, goal, revision)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return
+        path = tuple(path)
+        self.entries[key] = (path, {cell: i for i, cell in enumerate(path)})
+        self.by_goal.setdefault((goal, revision), {})[key] = None
+
+        while len(self.entries) > self.capacity:
+            old_key, _ = self.entries.popitem(last=False)
+            bucket = self.by_goal[(old_key[1], old_key[2])]
+            del bucket[old_key]
+            if not bucket:
+                del self.by_goal[(old_key[1], old_key[2])]
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.by_goal.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "subpath_hits": self.subpath_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# ==========================
+# Engine selection
+# ==========================
+PATH_METHODS = {
+    "astar": astar,
+    "jps": jps,
+}
+
+# global default, used whenever a caller doesn't ask for a specific engine
+DEFAULT_PATH_METHOD = "jps"
+
+
+def set_default_path_method(method: str):
+    global DEFAULT_PATH_METHOD
+    if method not in PATH_METHODS:
+        raise ValueError(f"unknown path method: {method}")
+    DEFAULT_PATH_METHOD = method
+
+
+def find_path(grid, start: Tuple[int, int], goal: Tuple[int, int], method: Optional[str] = None, stats: Optional[dict] = None) -> List[Tuple[int, int]]:
+    return PATH_METHODS[method or DEFAULT_PATH_METHOD](grid, start, goal, stats=stats)
@@ -0,0 +1,166 @@
+import hashlib
+import os
+from array import array
+from typing import Optional, Tuple
+
+from navgrid import ray_cells
+
+WALL = 1
+
+# bump when the table layout or the line rule changes, so old cache files are ignored
+FORMAT_VERSION = 1
+# the cache directory is pruned, least recently used first, to stay under this size
+CACHE_LIMIT_BYTES = 16 * 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "scp-rework", "pvs")
+
+
+def _diamond(radius: int):
+    # every (dx, dy) offset within Manhattan radius, in a fixed order
+    return [(dx, dy) for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1) if abs(dx) + abs(dy) <= radius]
+
+
+class VisibilityTable:
+    """Precomputed los_clear results between walkable cells within a Manhattan range.
+
+    Each walkable source cell owns one bitset row with a bit per offset in the
+    range diamond, so a query is a couple of index lookups and a bit test.
+    Targets may be walls (los_clear ignores the endpoints); sources must be
+    walkable. Queries outside the table return None and the caller falls back.
+    With a cache_dir (e.g. default_cache_dir()) tables are kept on disk per map.
+    """
+
+    def __init__(self, grid, radius: int, revision: int = 0, cache_dir: Optional[str] = None,
+                 cache_limit: int = CACHE_LIMIT_BYTES):
+        self.w, self.h = len(grid[0]), len(grid)
+        self.radius = radius
+        self.revision = revision
+        self.offsets = _diamond(radius)
+        self.row_bytes = (len(self.offsets) + 7) // 8
+
+        side = 2 * radius + 1
+        self.offset_index = array("i", [-1]) * (side * side)
+        for k, (dx, dy) in enumerate(self.offsets):
+            self.offset_index[(dy + radius) * side + dx + radius] = k
+
+        w = self.w
+        self.cells = bytes(grid.data) if hasattr(grid, "data") else b"".join(bytes(row) for row in grid)
+        self.row_of = array("i", [-1]) * len(self.cells)
+        n = 0
+        for i, v in enumerate(self.cells):
+            if v != WALL:
+                self.row_of[i] = n
+                n += 1
+        self.sources = n
+
+        key = hashlib.sha1(f"{FORMAT_VERSION}:{w}x{self.h}:r{radius}:".encode() + self.cells).hexdigest()
+        self.cache_path = os.path.join(cache_dir, key + ".bin") if cache_dir else None
+        self.cache_limit = cache_limit
+        self.loaded_from_cache = False
+        self.bits = self._load()
+        if self.bits is None:
+            self.bits = self._build()
+            self._save()
+
+    # --------------------------
+    # build / disk cache
+    # --------------------------
+    def _build(self) -> bytearray:
+        w, h, cells = self.w, self.h, self.cells
+        bits = bytearray(self.sources * self.row_bytes)
+        # cells strictly between source and target, as flat index deltas (same for every source)
+        rays = [tuple(x + y * w for (x, y) in ray_cells(dx, dy)) for (dx, dy) in self.offsets]
+        for i, v in enumerate(cells):
+            if v == WALL:
+                continue
+            sx, sy = i % w, i // w
+            base = self.row_of[i] * self.row_bytes
+            for k, (dx, dy) in enumerate(self.offsets):
+                tx, ty = sx + dx, sy + dy
+                if not (0 <= tx < w and 0 <= ty < h):
+                    continue
+                for d in rays[k]:
+                    if cells[i + d] == WALL:
+                        break
+                else:
+                    bits[base + (k >> 3)] |= 1 << (k & 7)
+        return bits
+
+    def _load(self) -> Optional[bytearray]:
+        if self.cache_path is None:
+            return None
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != self.sources * self.row_bytes:
+            return None
+        try:
+            os.utime(self.cache_path)  # mark as recently used for pruning
+        except OSError:
+            pass
+        self.loaded_from_cache = True
+        return bytearray(data)
+
+    def _save(self):
+        if self.cache_path is None:
+            return
+        # write then rename, so a concurrent reader never sees half a file
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(self.bits)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            return
+        self._prune()
+
+    def _prune(self):
+        # drop the least recently used tables until the directory fits the limit
+        folder = os.path.dirname(self.cache_path)
+        files = []
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name.endswith(".bin") and entry.is_file():
+                        st = entry.stat()
+                        files.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        files.sort()
+        for _, size, path in files:
+            if total <= self.cache_limit:
+                break
+            if path == self.cache_path:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    # --------------------------
+    # queries
+    # --------------------------
+    def visible(self, a: Tuple[int, int], b: Tuple[int, int]) -> Optional[bool]:
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        r = self.radius
+        if abs(dx) + abs(dy) > r:
+            return None
+        if not (0 <= a[0] < self.w and 0 <= a[1] < self.h and 0 <= b[0] < self.w and 0 <= b[1] < self.h):
+            return None
+        row = self.row_of[a[1] * self.w + a[0]]
+        if row < 0:
+            return None
+        k = self.offset_index[(dy + r) * (2 * r + 1) + dx + r]
+        return bool(self.bits[row * self.row_bytes + (k >> 3)] >> (k & 7) & 1)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
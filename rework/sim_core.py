@@ -0,0 +1,1500 @@
+import math
+import random
+from dataclasses import dataclass
+from typing import List, Tuple, Dict, Optional, Sequence
+
+from pathfinding import find_path, DistanceField, FleeMap, PathCache
+from hpa import HierarchicalPlanner
+from path_queue import PathRequestQueue, PathRequest
+from path_workers import PathWorkerPool
+from chase_planner import ChasePlanner
+from navgrid import NavGrid, ray_cells
+from path_follow import Path
+from pvs import VisibilityTable
+from spatial_hash import SpatialHash
+from frontier import Frontier
+
+# ==========================
+# Utils
+# ==========================
+def clamp(v, lo, hi):
+    return max(lo, min(hi, v))
+
+
+def dist(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def manhattan(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+# ==========================
+# Facility / Building Generation
+# ==========================
+@dataclass
+class Rect:
+    # the few pygame.Rect bits map generation needs, so the sim never imports pygame
+    x: int
+    y: int
+    w: int
+    h: int
+
+    def colliderect(self, other: "Rect") -> bool:
+        return self.x < other.x + other.w and other.x < self.x + self.w and self.y < other.y + other.h and other.y < self.y + self.h
+
+
+@dataclass
+class Building:
+    bid: int
+    rect: Rect  # in grid coords
+    door: Tuple[int, int]
+    interior_cells: List[Tuple[int, int]]
+
+
+def _rects_overlap(a: Rect, b: Rect, pad: int = 1) -> bool:
+    aa = Rect(a.x - pad, a.y - pad, a.w + pad * 2, a.h + pad * 2)
+    bb = Rect(b.x - pad, b.y - pad, b.w + pad * 2, b.h + pad * 2)
+    return aa.colliderect(bb)
+
+
+def _dig_corridor(grid, a: Tuple[int, int], b: Tuple[int, int], rng: random.Random = random):
+    x, y = a
+    tx, ty = b
+    w, h = len(grid[0]), len(grid)
+    for _ in range(2000):
+        grid[y][x] = 0
+        if (x, y) == (tx, ty):
+            break
+        if rng.random() < 0.5:
+            if x < tx:
+                x += 1
+            elif x > tx:
+                x -= 1
+        else:
+            if y < ty:
+                y += 1
+            elif y > ty:
+                y -= 1
+        x = clamp(x, 1, w - 2)
+        y = clamp(y, 1, h - 2)
+
+
+def generate_facility(map_w: int, map_h: int, num_buildings: int = 6, rng: random.Random = random) -> Tuple[List[List[int]], List[List[int]], List[Building]]:
+    # grid: 0 floor (outdoor), 1 wall, 2 door (passable)
+    grid = [[0 for _ in range(map_w)] for _ in range(map_h)]
+    building_id = [[-1 for _ in range(map_w)] for _ in range(map_h)]
+    buildings: List[Building] = []
+
+    # boundary
+    for x in range(map_w):
+        grid[0][x] = 1
+        grid[map_h - 1][x] = 1
+    for y in range(map_h):
+        grid[y][0] = 1
+        grid[y][map_w - 1] = 1
+
+    # scatter some outdoor cover/obstacles
+    for _ in range(10):
+        rw = rng.randint(2, 5)
+        rh = rng.randint(2, 4)
+        cx = rng.randint(2, map_w - rw - 3)
+        cy = rng.randint(2, map_h - rh - 3)
+        for yy in range(cy, cy + rh):
+            for xx in range(cx, cx + rw):
+                if rng.random() < 0.55:
+                    grid[yy][xx] = 1
+
+    # buildings
+    placed_rects: List[Rect] = []
+    attempts = 0
+    bid = 0
+    while bid < num_buildings and attempts < 800:
+        attempts += 1
+        bw = rng.randint(9, 15)
+        bh = rng.randint(7, 12)
+        bx = rng.randint(2, map_w - bw - 3)
+        by = rng.randint(2, map_h - bh - 3)
+        rect = Rect(bx, by, bw, bh)
+
+        if any(_rects_overlap(rect, r, pad=2) for r in placed_rects):
+            continue
+
+        # build perimeter walls + interior floor
+        interior_cells = []
+        for y in range(by, by + bh):
+            for x in range(bx, bx + bw):
+                on_edge = (x == bx or y == by or x == bx + bw - 1 or y == by + bh - 1)
+                if on_edge:
+                    grid[y][x] = 1
+                else:
+                    grid[y][x] = 0
+                    building_id[y][x] = bid
+                    interior_cells.append((x, y))
+
+        # internal partition(s)
+        if bw >= 12 and rng.random() < 0.9:
+            px = bx + rng.randint(3, bw - 4)
+            for y in range(by + 1, by + bh - 1):
+                grid[y][px] = 1
+            # doorway in partition
+            dy = by + rng.randint(2, bh - 3)
+            grid[dy][px] = 0
+
+        if bh >= 10 and rng.random() < 0.8:
+            py = by + rng.randint(3, bh - 4)
+            for x in range(bx + 1, bx + bw - 1):
+                grid[py][x] = 1
+            dx = bx + rng.randint(2, bw - 3)
+            grid[py][dx] = 0
+
+        # add a door on perimeter
+        side = rng.choice(["N", "S", "W", "E"])
+        if side == "N":
+            door = (bx + rng.randint(2, bw - 3), by)
+            outside = (door[0], door[1] - 1)
+        elif side == "S":
+            door = (bx + rng.randint(2, bw - 3), by + bh - 1)
+            outside = (door[0], door[1] + 1)
+        elif side == "W":
+            door = (bx, by + rng.randint(2, bh - 3))
+            outside = (door[0] - 1, door[1])
+        else:
+            door = (bx + bw - 1, by + rng.randint(2, bh - 3))
+            outside = (door[0] + 1, door[1])
+
+        # door tile passable
+        grid[door[1]][door[0]] = 2
+
+        # ensure door connects to outdoors (dig 1-3 tiles)
+        if 0 <= outside[0] < map_w and 0 <= outside[1] < map_h:
+            _dig_corridor(grid, outside, (clamp(outside[0] + rng.randint(-2, 2), 1, map_w - 2),
+                                          clamp(outside[1] + rng.randint(-2, 2), 1, map_h - 2)), rng)
+
+        buildings.append(Building(bid=bid, rect=rect, door=door, interior_cells=interior_cells))
+        placed_rects.append(rect)
+        bid += 1
+
+    return grid, building_id, buildings
+
+
+def random_floor_cell(grid, avoid: Optional[List[Tuple[int, int]]] = None, tries=5000, zone: Optional[int] = None,
+                      rng: random.Random = random) -> Tuple[int, int]:
+    if isinstance(grid, NavGrid):
+        # per-map index: a few samples against the avoid mask, never a full rescan
+        index = grid.floor_index()
+        cell = index.pick(avoid=avoid, radius=6, zone=zone, rng=rng)
+        if cell is None and zone is not None:
+            cell = index.pick(avoid=avoid, radius=6, rng=rng)
+        return cell if cell is not None else (1, 1)
+    avoid = avoid or []
+    h = len(grid)
+    w = len(grid[0])
+    for _ in range(tries):
+        x = rng.randint(1, w - 2)
+        y = rng.randint(1, h - 2)
+        if grid[y][x] != 1 and all(manhattan((x, y), a) > 6 for a in avoid):
+            return (x, y)
+    for y in range(1, h - 1):
+        for x in range(1, w - 1):
+            if grid[y][x] != 1:
+                return (x, y)
+    return (1, 1)
+
+
+# ==========================
+# Simulation Data
+# ==========================
+ATTR_KEYS = ["speed", "perception", "tactics", "aim", "endurance", "courage", "medical", "containment"]
+
+ROLE_TEMPLATES = {
+    "Leader":   {"speed": 10, "perception": 12, "tactics": 16, "aim": 12, "endurance": 12, "courage": 16, "medical": 6, "containment": 12},
+    "Scout":    {"speed": 16, "perception": 17, "tactics": 10, "aim": 10, "endurance": 10, "courage": 12, "medical": 5, "containment": 10},
+    "Medic":    {"speed": 10, "perception": 12, "tactics": 10, "aim": 8,  "endurance": 12, "courage": 12, "medical": 18, "containment": 10},
+    "Breacher": {"speed": 11, "perception": 10, "tactics": 12, "aim": 12, "endurance": 17, "courage": 13, "medical": 6, "containment": 14},
+    "Sniper":   {"speed": 10, "perception": 16, "tactics": 10, "aim": 18, "endurance": 9,  "courage": 11, "medical": 4, "containment": 9},
+    "Tech":     {"speed": 9,  "perception": 11, "tactics": 14, "aim": 10, "endurance": 10, "courage": 10, "medical": 8, "containment": 16},
+}
+
+
+def jitter_base(v, spread=4, rng: random.Random = random):
+    return clamp(v + rng.randint(-spread, spread), 0, 20)
+
+
+@dataclass
+class DamageOverTime:
+    dps: float
+    duration: float
+
+
+@dataclass
+class Tracer:
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    ttl: float
+    color: Tuple[int, int, int]
+
+
+@dataclass
+class Weapon:
+    name: str
+    damage_min: float
+    damage_max: float
+    range_tiles: int
+    fire_rate: float      # shots per second
+    accuracy: float       # base 0..1
+    mag_size: int
+    reload_time: float
+
+
+WEAPONS = {
+    "Rifle":   Weapon("Rifle", damage_min=10, damage_max=16, range_tiles=9,  fire_rate=3.0, accuracy=0.62, mag_size=30, reload_time=1.9),
+    "SMG":     Weapon("SMG",   damage_min=7,  damage_max=12, range_tiles=7,  fire_rate=5.2, accuracy=0.50, mag_size=28, reload_time=1.7),
+    "Shotgun": Weapon("Shotgun", damage_min=14, damage_max=24, range_tiles=4, fire_rate=1.4, accuracy=0.56, mag_size=6, reload_time=2.3),
+    "Sniper":  Weapon("Sniper", damage_min=18, damage_max=32, range_tiles=13, fire_rate=0.9, accuracy=0.78, mag_size=5, reload_time=2.5),
+    "Carbine": Weapon("Carbine", damage_min=9, damage_max=14, range_tiles=8,  fire_rate=3.6, accuracy=0.58, mag_size=25, reload_time=1.8),
+    "Pistol":  Weapon("Pistol", damage_min=6, damage_max=10, range_tiles=6,  fire_rate=2.2, accuracy=0.46, mag_size=12, reload_time=1.5),
+}
+
+# longest line of sight the sim asks about: weapon ranges, anomaly ranged attacks (<= 13), perception (<= 9)
+LOS_TABLE_RANGE = max(max(w.range_tiles for w in WEAPONS.values()), 13, 9)
+
+# maps at least this many cells plan long paths through the HPA* hierarchy; smaller ones
+# (the default 52x34 included) search the grid directly, which is exact and still cheap
+HPA_MIN_CELLS = 96 * 64
+
+ROLE_WEAPON = {
+    "Leader": "Rifle",
+    "Scout": "SMG",
+    "Medic": "Pistol",
+    "Breacher": "Shotgun",
+    "Sniper": "Sniper",
+    "Tech": "Carbine",
+}
+
+DEFAULT_TEAM = ("Leader", "Scout", "Medic", "Breacher", "Sniper", "Tech")
+
+# inclusive roll range per anomaly stat
+ANOMALY_STAT_RANGES = {
+    "threat": (8, 18),
+    "speed": (8, 18),
+    "stealth": (6, 18),
+    "aggression": (8, 18),
+    "resilience": (8, 18),
+}
+
+
+@dataclass
+class OperationStats:
+    shots_fired: int = 0
+    shots_hit: int = 0
+    containment_attempts: int = 0
+    kia: int = 0
+
+
+class EventLog:
+    def __init__(self, max_lines=400):
+        self.lines: List[str] = []
+        self.max_lines = max_lines
+        self.scroll = 0
+
+    def add(self, msg: str):
+        self.lines.append(msg)
+        if len(self.lines) > self.max_lines:
+            self.lines = self.lines[-self.max_lines:]
+        self.scroll = 0
+
+    def scroll_by(self, dy: int):
+        self.scroll = clamp(self.scroll + dy, 0, max(0, len(self.lines) - 1))
+
+
+class Entity:
+    def __init__(self, gx: int, gy: int):
+        self.gx = gx
+        self.gy = gy
+        self.px = float(gx)
+        self.py = float(gy)
+        self.path = Path()
+        self.manual_target: Optional[Tuple[int, int]] = None
+        # queued search, when the sim plans asynchronously; the old path is kept meanwhile
+        self.path_request: Optional[PathRequest] = None
+        # the sim's spatial hash, told about every change of cell
+        self.space: Optional[SpatialHash] = None
+
+    def set_grid_pos(self, gx, gy):
+        self.gx, self.gy = gx, gy
+        self.px, self.py = float(gx), float(gy)
+        if self.space is not None:
+            self.space.move(self)
+
+    def follow_path(self, dt: float, spd: float) -> bool:
+        # move toward the next cell of the path; True when a new cell was reached
+        if spd <= 0 or not self.path:
+            return False
+        tx, ty = self.path.peek()
+        vx = tx - self.px
+        vy = ty - self.py
+        d = math.hypot(vx, vy)
+        step = spd * dt
+        if d < 1e-6 or step >= d:
+            self.px, self.py = float(tx), float(ty)
+            self.gx, self.gy = tx, ty
+            self.path.advance()
+            if self.space is not None:
+                self.space.move(self)
+            return True
+        self.px += (vx / d) * step
+        self.py += (vy / d) * step
+        return False
+
+
+# ==========================
+# Combat helpers
+# ==========================
+def los_clear(grid, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+    ax, ay = a
+    for (ox, oy) in ray_cells(b[0] - ax, b[1] - ay):
+        if grid[ay + oy][ax + ox] == 1:
+            return False
+    return True
+
+
+_DIAMONDS: Dict[int, List[Tuple[int, int]]] = {}
+
+
+def diamond_offsets(radius: int) -> List[Tuple[int, int]]:
+    # offsets within Manhattan distance radius of a cell, built once per radius
+    offsets = _DIAMONDS.get(radius)
+    if offsets is None:
+        offsets = _DIAMONDS[radius] = [(dx, dy) for dy in range(-radius, radius + 1)
+                                       for dx in range(abs(dy) - radius, radius - abs(dy) + 1)]
+    return offsets
+
+
+# hit penalty per directional cover level (walls on the shooter's side, 0..3)
+COVER_PENALTY = tuple(min(0.22, c * 0.06) for c in range(4))
+
+
+def target_has_cover(grid, target: Tuple[int, int], shooter: Optional[Tuple[int, int]] = None) -> float:
+    # simple cover heuristic: walls adjacent -> some cover
+    x, y = target
+    if shooter is not None and isinstance(grid, NavGrid):
+        return COVER_PENALTY[grid.cover_from(x, y, shooter[0], shooter[1])]
+    if isinstance(grid, NavGrid):
+        cover = grid.cover_counts()[y * grid.w + x]
+    else:
+        h = len(grid)
+        w = len(grid[0])
+        cover = 0
+        for nx, ny in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
+            if 0 <= nx < w and 0 <= ny < h and grid[ny][nx] == 1:
+                cover += 1
+    # 0..4 -> 0..0.22ish reduction later
+    return min(0.22, cover * 0.06)
+
+
+# ==========================
+# Operative
+# ==========================
+class Operative(Entity):
+    def __init__(self, name: str, role: str, gx: int, gy: int, attrs: Dict[str, int], weapon: Optional[str] = None):
+        super().__init__(gx, gy)
+        self.name = name
+        self.role = role
+        self.attrs = attrs
+
+        self.hp_max = 60 + int(self.attrs["endurance"] * 4)
+        self.hp = float(self.hp_max)
+        self.alive = True
+
+        self.injured = False
+        self.bleeds: List[DamageOverTime] = []
+        self.panic = 0.0  # 0..100
+        self.fleeing = False
+        self.incapacitated = False
+
+        self.state = "inserting"  # search/chase/capture/extract/flee/manual
+        self.cooldown = 0.0
+
+        self.kit_integrity = 100.0  # affects containment odds
+        self.last_seen_anomaly: Optional[Tuple[int, int]] = None
+        self.detected_anomaly = False
+        # search state kept between replans while chasing
+        self.chase_planner: Optional[ChasePlanner] = None
+
+        # weapon
+        self.weapon = WEAPONS[weapon or ROLE_WEAPON.get(role, "Rifle")]
+        self.ammo = self.weapon.mag_size
+        self.reloading = 0.0
+
+        # fire control (separate from other cooldown)
+        self.fire_cd = 0.0
+        # hit chance by [injured][distance][cover level] against the current anomaly
+        self.hit_table: Optional[List[List[Tuple[float, ...]]]] = None
+        self.damage_scale = 1.0
+
+    def speed_tiles_per_sec(self):
+        base = 1.4 + (self.attrs["speed"] / 20.0) * 2.0
+        if self.injured:
+            base *= 0.65
+        if self.fleeing:
+            base *= 1.15
+        if self.incapacitated:
+            base *= 0.0
+        return base
+
+    def perception_radius(self):
+        return 3 + int(self.attrs["perception"] / 3)  # 3..9
+
+    def aim_quality(self):
+        return self.attrs["aim"] / 20.0
+
+    def courage_resist(self):
+        return self.attrs["courage"] / 20.0
+
+    def tactics_bonus(self):
+        return self.attrs["tactics"] / 20.0
+
+    def containment_skill(self):
+        return (self.attrs["containment"] / 20.0) * (0.55 + 0.45 * (self.kit_integrity / 100.0))
+
+    def medical_skill(self):
+        return self.attrs["medical"] / 20.0
+
+    def build_hit_table(self, anomaly):
+        # everything in the hit formula but injury, distance and cover is fixed for the operation
+        aim = self.weapon.accuracy * (0.55 + 0.45 * self.aim_quality())
+        table = []
+        for base in (aim, aim * 0.78):
+            rows = []
+            for d in range(self.weapon.range_tiles + 1):
+                d = max(1, d)
+                falloff = clamp(1.0 - (d / (self.weapon.range_tiles + 2)) * 0.35, 0.55, 1.0)
+                # anomaly stealth makes it harder to hit a bit (especially at range)
+                stealth_pen = (anomaly.stealth / 20.0) * (0.06 + 0.02 * d)
+                rows.append(tuple(clamp(base * falloff - cover - stealth_pen, 0.05, 0.88) for cover in COVER_PENALTY))
+            table.append(rows)
+        self.hit_table = table
+        # tactical bonus slightly increases effectiveness
+        self.damage_scale = 0.92 + 0.16 * self.tactics_bonus()
+
+    def apply_damage(self, sim, amount: float, cause: str = "unknown"):
+        if not self.alive or self.incapacitated:
+            return
+
+        self.hp -= amount
+        sim.log.add(f"{self.name} took {amount:.0f} damage ({cause}).")
+
+        if amount >= 10 and sim.combat_rng.random() < 0.25:
+            self.bleeds.append(DamageOverTime(dps=1.2 + sim.combat_rng.random() * 1.2, duration=8 + sim.combat_rng.random() * 6))
+            sim.log.add(f"{self.name} is bleeding!")
+
+        if self.hp <= self.hp_max * 0.45 and not self.injured and self.hp > 0:
+            self.injured = True
+            sim.log.add(f"{self.name} is injured (movement & actions slower).")
+
+        panic_gain = amount * (1.2 - self.courage_resist())
+        self.panic = clamp(self.panic + panic_gain, 0, 100)
+
+        if not self.fleeing and self.panic > 65 and sim.combat_rng.random() < (0.15 + (self.panic - 65) / 100.0) * (1.0 - self.courage_resist()):
+            self.fleeing = True
+            self.state = "flee"
+            sim.log.add(f"{self.name} panics and flees!")
+
+        if self.hp <= 0:
+            self.kill(sim, f"{self.name} is KIA.")
+
+    def kill(self, sim, message: str):
+        # every death goes through here, so the KIA count matches the dead
+        if not self.alive:
+            return
+        self.alive = False
+        self.incapacitated = True
+        self.state = "dead"
+        sim.stats.kia += 1
+        sim.log.add(message)
+
+    def update_bleeding(self, sim, dt):
+        if not self.bleeds or not self.alive or self.incapacitated:
+            return
+        remaining = []
+        for b in self.bleeds:
+            self.hp -= b.dps * dt
+            b.duration -= dt
+            if b.duration > 0:
+                remaining.append(b)
+        self.bleeds = remaining
+        if self.hp <= 0:
+            self.kill(sim, f"{self.name} bled out.")
+
+    def heal_nearby(self, sim, dt):
+        if self.medical_skill() < 0.25 or not self.alive or self.incapacitated:
+            return
+        if self.state in ("chase", "capture") and sim.ai_rng.random() < 0.6:
+            return
+        if self.panic > 70:
+            return
+
+        for other in sim.space.query_radius((self.gx, self.gy), 1, sim.is_operative):
+            if other is self or not other.alive:
+                continue
+            if other.hp < other.hp_max and (other.injured or other.bleeds):
+                heal_rate = 2.0 + 8.0 * self.medical_skill()
+                other.hp = min(other.hp_max, other.hp + heal_rate * dt)
+                if other.bleeds and sim.combat_rng.random() < 0.2 * self.medical_skill():
+                    other.bleeds.pop(0)
+                    sim.log.add(f"{self.name} stabilizes {other.name}'s bleeding.")
+                if other.hp > other.hp_max * 0.55:
+                    other.injured = False
+                if sim.combat_rng.random() < 0.08:
+                    sim.log.add(f"{self.name} treats {other.name}.")
+            break
+
+    def can_see(self, sim, target: Tuple[int, int]) -> bool:
+        if manhattan((self.gx, self.gy), target) > self.perception_radius():
+            return False
+        return sim.los((self.gx, self.gy), target)
+
+    def choose_explore_target(self, sim) -> Optional[Tuple[int, int]]:
+        # best few frontier cells of every building (and outdoors), then distance and crowding
+        best = None
+        for score, (x, y) in sim.frontier.candidates():
+            score -= manhattan((self.gx, self.gy), (x, y)) * 0.06
+            score -= sim.space.count_radius((x, y), 2, sim.is_live_operative) * 0.6
+            if best is None or score > best[0]:
+                best = (score, (x, y))
+        if best is not None:
+            return best[1]
+        return self.sample_explore_target(sim)
+
+    def sample_explore_target(self, sim) -> Optional[Tuple[int, int]]:
+        # no frontier left (everything revealed): sample cells, preferring unvisited interiors
+        candidates = []
+
+        # If we haven't entered many buildings, bias towards building cells
+        for _ in range(160):
+            if sim.ai_rng.random() < 0.75 and sim.buildings:
+                b = sim.ai_rng.choice(sim.buildings)
+                if not b.interior_cells:
+                    continue
+                x, y = sim.ai_rng.choice(b.interior_cells)
+            else:
+                x = sim.ai_rng.randint(1, sim.map_w - 2)
+                y = sim.ai_rng.randint(1, sim.map_h - 2)
+
+            if sim.grid[y][x] == 1 or not sim.grid.connected(sim.entry, (x, y)):
+                continue
+
+            score = 0.0
+            score += 2.2 if not sim.visited.get(x, y) else 0.0
+
+            # frontier preference
+            score += sim.revealed.unset_neighbours(x, y) * 0.85
+
+            # building bias (sweep)
+            if sim.building_id[y][x] != -1:
+                score += 1.2
+
+            score -= manhattan((self.gx, self.gy), (x, y)) * 0.06
+            crowd = sim.space.count_radius((x, y), 2, sim.is_live_operative)
+            score -= crowd * 0.6
+
+            candidates.append((score, (x, y)))
+
+        if not candidates:
+            return None
+        candidates.sort(key=lambda t: t[0], reverse=True)
+        return candidates[0][1]
+
+    def decide(self, sim):
+        if not self.alive or self.incapacitated:
+            return
+
+        if sim.retreat_order or self.fleeing or sim.phase == "extraction":
+            self.state = "extract"
+            self.manual_target = sim.extraction
+            return
+
+        if self.manual_target is not None:
+            self.state = "manual"
+            return
+
+        if sim.team_last_known_anomaly is not None:
+            # flanking a bit if tactics good
+            tx, ty = sim.team_last_known_anomaly
+            if sim.ai_rng.random() < 0.35 + 0.35 * self.tactics_bonus():
+                ox = sim.ai_rng.randint(-2, 2)
+                oy = sim.ai_rng.randint(-2, 2)
+                tgt = (clamp(tx + ox, 1, sim.map_w - 2), clamp(ty + oy, 1, sim.map_h - 2))
+                if sim.is_passable(tgt):
+                    self.state = "chase"
+                    self.manual_target = tgt
+                    return
+            self.state = "chase"
+            self.manual_target = sim.team_last_known_anomaly
+            return
+
+        self.state = "search"
+        tgt = self.choose_explore_target(sim)
+        if tgt:
+            self.manual_target = tgt
+
+    def adopt_path(self, sim, p: List[Tuple[int, int]]):
+        if p:
+            self.path = sim.make_path(p)
+        else:
+            self.manual_target = None
+            self.path = Path()
+
+    def try_reload(self, sim):
+        if self.reloading <= 0 and self.ammo <= 0:
+            self.reloading = self.weapon.reload_time
+            sim.log.add(f"{self.name} reloads ({self.weapon.name}).")
+
+    def try_shoot_anomaly(self, sim, dt):
+        if not self.alive or self.incapacitated:
+            return
+        if not sim.anomaly or sim.anomaly.contained:
+            return
+        if self.reloading > 0:
+            return
+
+        ax, ay = sim.anomaly.gx, sim.anomaly.gy
+        if manhattan((self.gx, self.gy), (ax, ay)) > self.weapon.range_tiles:
+            return
+        if not sim.los((self.gx, self.gy), (ax, ay)):
+            return
+
+        # cadence
+        if self.fire_cd > 0:
+            return
+
+        self.try_reload(sim)
+        if self.reloading > 0:
+            return
+        if self.ammo <= 0:
+            return
+
+        # fire
+        self.fire_cd = 1.0 / max(0.2, self.weapon.fire_rate)
+        self.ammo -= 1
+        sim.stats.shots_fired += 1
+
+        # visual tracer
+        sim.tracers.append(Tracer(
+            x0=self.px + 0.5, y0=self.py + 0.5,
+            x1=sim.anomaly.px + 0.5, y1=sim.anomaly.py + 0.5,
+            ttl=0.10, color=(230, 220, 120)
+        ))
+
+        # hit chance
+        if self.hit_table is None:
+            self.build_hit_table(sim.anomaly)
+        d = manhattan((self.gx, self.gy), (ax, ay))
+        chance = self.hit_table[self.injured][d][sim.grid.cover_from(ax, ay, self.gx, self.gy)]
+
+        if sim.combat_rng.random() < chance:
+            sim.stats.shots_hit += 1
+            dmg = sim.combat_rng.uniform(self.weapon.damage_min, self.weapon.damage_max) * self.damage_scale
+            sim.anomaly.apply_damage(sim, dmg, cause=f"{self.weapon.name} hit by {self.name}")
+            # gunfire pressure reduces stability (easier containment)
+            sim.anomaly.stability = clamp(sim.anomaly.stability - (3.0 + dmg * 0.15), 0, 100)
+            # aggro rises
+            sim.anomaly.aggro = clamp(sim.anomaly.aggro + 5.0, 0, 100)
+        else:
+            # near miss raises aggro a bit
+            sim.anomaly.aggro = clamp(sim.anomaly.aggro + 1.5, 0, 100)
+
+    def attempt_capture(self, sim):
+        if not self.alive or self.incapacitated:
+            return False
+        if sim.anomaly is None or sim.anomaly.contained:
+            return False
+        if manhattan((self.gx, self.gy), (sim.anomaly.gx, sim.anomaly.gy)) > 1:
+            return False
+
+        stability_factor = 1.0 - (sim.anomaly.stability / 100.0)
+        skill = self.containment_skill()
+
+        adjacent = sim.space.count_radius((sim.anomaly.gx, sim.anomaly.gy), 1, sim.is_active_operative)
+        team_factor = 1.0 + (adjacent - 1) * 0.35
+
+        # immobilized anomaly is easier
+        imm = 1.25 if sim.anomaly.immobilized else 1.0
+
+        res = sim.anomaly.resilience / 20.0
+        base = 0.05 + 0.35 * skill
+        chance = base * (0.35 + 0.65 * stability_factor) * team_factor * imm * (1.0 - 0.45 * res)
+        chance = clamp(chance, 0.03, 0.82)
+
+        sim.stats.containment_attempts += 1
+        self.kit_integrity = clamp(self.kit_integrity - (6 + sim.combat_rng.random() * 8), 0, 100)
+        sim.anomaly.aggro = clamp(sim.anomaly.aggro + 10, 0, 100)
+
+        if sim.combat_rng.random() < chance:
+            sim.anomaly.contained = True
+            sim.phase = "extraction"
+            sim.log.add(f"CONTAINMENT SUCCESS by {self.name}! Begin extraction.")
+            return True
+        else:
+            sim.log.add(f"{self.name} containment attempt failed.")
+            if sim.combat_rng.random() < 0.20 + 0.35 * (sim.anomaly.threat / 20.0):
+                self.apply_damage(sim, 8 + sim.combat_rng.random() * 16, cause="containment backlash")
+            return False
+
+    def update(self, sim, dt):
+        if not self.alive:
+            return
+
+        self.cooldown = max(0.0, self.cooldown - dt)
+        self.fire_cd = max(0.0, self.fire_cd - dt)
+
+        if self.reloading > 0:
+            self.reloading -= dt
+            if self.reloading <= 0:
+                self.ammo = self.weapon.mag_size
+                sim.log.add(f"{self.name} finished reloading.")
+
+        # panic recovery if not in immediate contact
+        near_threat = False
+        if sim.anomaly and not sim.anomaly.contained:
+            near_threat = manhattan((self.gx, self.gy), (sim.anomaly.gx, sim.anomaly.gy)) <= 7
+        if not near_threat:
+            self.panic = max(0.0, self.panic - dt * (8.0 + 12.0 * self.courage_resist()))
+
+        self.update_bleeding(sim, dt)
+        if not self.alive:
+            return
+
+        self.heal_nearby(sim, dt)
+
+        # detect anomaly
+        self.detected_anomaly = False
+        if sim.anomaly and not sim.anomaly.contained:
+            if sim.sees_anomaly(self):
+                self.detected_anomaly = True
+                self.last_seen_anomaly = (sim.anomaly.gx, sim.anomaly.gy)
+                sim.team_last_known_anomaly = (sim.anomaly.gx, sim.anomaly.gy)
+
+        # shooting if possible (this is the “match view” action!)
+        if sim.anomaly and not sim.anomaly.contained:
+            self.try_shoot_anomaly(sim, dt)
+
+        # containment attempt if adjacent (cadenced)
+        if sim.anomaly and not sim.anomaly.contained and manhattan((self.gx, self.gy), (sim.anomaly.gx, sim.anomaly.gy)) <= 1:
+            if self.cooldown <= 0:
+                self.cooldown = 0.8 + sim.combat_rng.random() * 0.7
+                self.attempt_capture(sim)
+
+        # planning / path
+        if self.path_request is not None:
+            if self.path_request.done:
+                p = self.path_request.path_from((self.gx, self.gy))
+                self.path_request = None
+                if p is not None:
+                    self.adopt_path(sim, p)
+        elif self.cooldown <= 0 and (not self.path or sim.ai_rng.random() < 0.03):
+            self.decide(sim)
+            if self.state != "chase":
+                self.chase_planner = None
+            if self.manual_target is not None:
+                if self.state == "chase":
+                    p = sim.chase_path(self, self.manual_target)
+                else:
+                    p = sim.request_path(self, self.manual_target)
+                if p is not None:
+                    self.adopt_path(sim, p)
+
+        # movement
+        spd = self.speed_tiles_per_sec()
+        if self.follow_path(dt, spd):
+            sim.visited.set(self.gx, self.gy)
+            if self.manual_target == (self.gx, self.gy):
+                self.manual_target = None
+
+        self.try_reload(sim)
+
+
+# ==========================
+# Anomaly
+# ==========================
+class Anomaly(Entity):
+    def __init__(self, code: str, gx: int, gy: int, threat: int, speed: int, stealth: int, aggression: int, resilience: int):
+        super().__init__(gx, gy)
+        self.code = code
+        self.threat = threat
+        self.speed = speed
+        self.stealth = stealth
+        self.aggression = aggression
+        self.resilience = resilience
+
+        self.contained = False
+        self.stability = 100.0
+        self.aggro = float(aggression) * 3.0
+        self.escape_timer = 0.0
+
+        self.hp_max = 80 + threat * 6 + resilience * 5
+        self.hp = float(self.hp_max)
+        self.immobilized = False
+
+        self.attack_cd = 0.0
+        # ranged attack: fixed for the operation, hit chance per target by cover level
+        self.ranged_range = 6 + int(self.threat / 4) + int(self.aggression / 5)  # ~6..12
+        self.ranged_damage = 7 + (self.threat / 20.0) * 16
+        self.hit_tables: Dict["Operative", Tuple[float, ...]] = {}
+
+    def build_hit_tables(self, operatives: List["Operative"]):
+        for op in operatives:
+            self.hit_table_for(op)
+
+    def hit_table_for(self, target: "Operative") -> Tuple[float, ...]:
+        table = self.hit_tables.get(target)
+        if table is None:
+            rows = []
+            for cover in COVER_PENALTY:
+                base = 0.35 + (self.threat / 20.0) * 0.35
+                base -= cover
+                # target courage reduces effective hit a bit (keeps composure)
+                base *= (0.85 + 0.15 * (1.0 - target.courage_resist()))
+                rows.append(clamp(base, 0.08, 0.75))
+            table = self.hit_tables[target] = tuple(rows)
+        return table
+
+    def speed_tiles_per_sec(self):
+        base = 1.6 + (self.speed / 20.0) * 2.2
+        if self.immobilized:
+            base *= 0.15
+        # low stability can make it “erratic” (small speed boost)
+        base *= (0.95 + (1.0 - self.stability / 100.0) * 0.25)
+        return base
+
+    def apply_damage(self, sim, amount: float, cause: str):
+        if self.contained:
+            return
+        self.hp -= amount
+        sim.log.add(f"{self.code} took {amount:.0f} damage ({cause}).")
+        if self.hp <= self.hp_max * 0.22 and not self.immobilized:
+            self.immobilized = True
+            sim.log.add(f"{self.code} destabilizes and slows (immobilized).")
+        if self.hp <= 0:
+            self.hp = 0
+            self.immobilized = True
+            sim.log.add(f"{self.code} manifestation collapses. Containment is now much easier.")
+
+    def choose_target(self, sim) -> Optional[Operative]:
+        # prefer closest visible operative
+        return sim.space.nearest((self.gx, self.gy), sim.is_active_operative)
+
+    def try_attack(self, sim, dt):
+        if self.contained:
+            return
+        if self.attack_cd > 0:
+            return
+
+        target = self.choose_target(sim)
+        if not target:
+            return
+
+        d = manhattan((self.gx, self.gy), (target.gx, target.gy))
+        can_see = sim.los((self.gx, self.gy), (target.gx, target.gy))
+
+        # aggression gate
+        aggro_gate = 0.35 + (self.aggro / 100.0) * 0.55
+        if sim.combat_rng.random() > aggro_gate:
+            return
+
+        # melee if close
+        if d <= 1:
+            lethality = 9 + (self.threat / 20.0) * 20
+            lethality *= (0.85 + 0.15 * (self.stability / 100.0))
+            target.apply_damage(sim, lethality + sim.combat_rng.random() * 6, cause=f"{self.code} melee")
+            self.attack_cd = 0.9 + sim.combat_rng.random() * 0.6
+            return
+
+        # ranged if line of sight + within range
+        if can_see and d <= self.ranged_range:
+            # tracer
+            sim.tracers.append(Tracer(
+                x0=self.px + 0.5, y0=self.py + 0.5,
+                x1=target.px + 0.5, y1=target.py + 0.5,
+                ttl=0.10, color=(220, 70, 70)
+            ))
+            # hit chance
+            cover = sim.grid.cover_from(target.gx, target.gy, self.gx, self.gy)
+            if sim.combat_rng.random() < self.hit_table_for(target)[cover]:
+                dmg = self.ranged_damage + sim.combat_rng.random() * 6
+                target.apply_damage(sim, dmg, cause=f"{self.code} ranged")
+            else:
+                # near miss adds panic
+                target.panic = clamp(target.panic + 6 * (1.1 - target.courage_resist()), 0, 100)
+            self.attack_cd = 1.1 + sim.combat_rng.random() * 0.7
+
+    def update(self, sim, dt):
+        if self.contained:
+            return
+
+        self.attack_cd = max(0.0, self.attack_cd - dt)
+
+        # seen by team?
+        visible_by = []
+        for op in sim.operatives:
+            if not op.alive:
+                continue
+            if sim.sees_anomaly(op):
+                # stealth makes it easier to “lose”
+                if sim.combat_rng.random() < (0.90 - (self.stealth / 20.0) * 0.20):
+                    visible_by.append(op)
+
+        if not visible_by:
+            self.stability = clamp(self.stability + dt * (2.0 + 5.0 * (self.resilience / 20.0)), 0, 100)
+            self.escape_timer += dt
+        else:
+            self.escape_timer = 0.0
+
+        # fight back if aggressive
+        self.try_attack(sim, dt)
+
+        # movement: if seen, evade; else roam within facility
+        spd = self.speed_tiles_per_sec()
+        if self.path_request is not None:
+            if self.path_request.done:
+                p = self.path_request.path_from((self.gx, self.gy))
+                self.path_request = None
+                if p is not None:
+                    self.path = sim.make_path(p)
+        elif not self.path or sim.ai_rng.random() < 0.06:
+            target = None
+            if visible_by:
+                # evade: walk downhill on the team's flee map, no search needed
+                p = sim.flee_map().flee_path((self.gx, self.gy), 9 + int(self.stealth / 2))
+                if len(p) > 1:
+                    self.path = sim.make_path(p)
+                else:
+                    # cornered (local minimum): break out toward any cell away from the team
+                    target = random_floor_cell(sim.grid, avoid=[(op.gx, op.gy) for op in sim.operatives if op.alive], rng=sim.ai_rng)
+            else:
+                # roam: bias into buildings to feel like "inside containment zone"
+                if sim.buildings and sim.ai_rng.random() < 0.65:
+                    b = sim.ai_rng.choice(sim.buildings)
+                    target = random_floor_cell(sim.grid, zone=b.bid, rng=sim.ai_rng)
+                else:
+                    target = random_floor_cell(sim.grid, rng=sim.ai_rng)
+
+            if target is not None:
+                p = sim.request_path(self, target)
+                if p is not None:
+                    self.path = sim.make_path(p)
+
+        self.follow_path(dt, spd)
+
+
+# ==========================
+# Operation Simulation
+# ==========================
+# sim seconds per update; every caller steps by this so results don't depend on frame rate
+TICK = 1.0 / 60.0
+# search budget per tick (node expansions) for queued entity paths; the viewer and batch runs
+# both plan with it, so a seed plays out the same in either
+PATH_BUDGET_NODES = 400
+
+
+class OperationCore:
+    """Simulation state and the fixed rules that advance it, with no display code.
+
+    Drive it with step() (update(TICK)) until finished; OperationSim in main.py
+    draws one and feeds it player input, batch runs use it as is. All randomness
+    comes from per-operation streams seeded from `seed`.
+    """
+
+    def __init__(self, map_w=52, map_h=34, path_budget_us: Optional[int] = None, path_budget_nodes: Optional[int] = None,
+                 path_workers: Optional[int] = None, path_worker_mode: str = "process", precompute_los: bool = True,
+                 los_cache_dir: Optional[str] = None, hierarchical_paths: Optional[bool] = None,
+                 team: Sequence[str] = DEFAULT_TEAM, role_weapons: Optional[Dict[str, str]] = None,
+                 anomaly_ranges: Optional[Dict[str, Tuple[int, int]]] = None, seed: Optional[int] = None):
+        self.map_w = map_w
+        self.map_h = map_h
+
+        # who gets sent in, and what they might face
+        self.team = list(team)
+        self.role_weapons = {**ROLE_WEAPON, **(role_weapons or {})}
+        self.anomaly_ranges = {**ANOMALY_STAT_RANGES, **(anomaly_ranges or {})}
+        self.stats = OperationStats()
+
+        # every roll comes from these, one stream per subsystem, all derived from the seed;
+        # a new AI rule then can't reshuffle the map or the dice
+        self.seed = 0
+        self.map_rng = random.Random()
+        self.ai_rng = random.Random()
+        self.combat_rng = random.Random()
+
+        self.log = EventLog()
+
+        self.paused = False
+        self.retreat_order = False
+
+        self.phase = "operation"  # operation/extraction/failure/success
+        # why it ended: deadline/escaped/team_lost/extracted
+        self.outcome: Optional[str] = None
+        self.elapsed = 0.0
+        self.deadline = 480.0
+
+        # world
+        self.grid = NavGrid(map_w, map_h)
+        self.building_id = self.grid.building
+        self.buildings: List[Building] = []
+        self.revealed = self.grid.revealed
+        self.visited = self.grid.visited
+        self.frontier = Frontier(self.grid)
+        # operative -> (cell, radius, grid revision) its view was last merged from
+        self.fog_views: Dict["Operative", Tuple[Tuple[int, int], int, int]] = {}
+        self.entry = (2, 2)
+        self.extraction = (2, 2)
+
+        self.operatives: List[Operative] = []
+        self.anomaly: Optional[Anomaly] = None
+        # every entity by cell, for proximity queries
+        self.space = SpatialHash(map_w, map_h)
+
+        self.team_last_known_anomaly: Optional[Tuple[int, int]] = None
+
+        # pathfinding: shared goal fields, cached paths etc. are keyed on grid_revision
+        self.goal_fields: Dict[Tuple[int, int], DistanceField] = {}
+        self.path_cache = PathCache(capacity=256)
+        self.hpa: Optional[HierarchicalPlanner] = None
+        # HPA* trades a few percent of path length for speed, so it's only on for big maps unless asked
+        self.hierarchical_paths = map_w * map_h >= HPA_MIN_CELLS if hierarchical_paths is None else hierarchical_paths
+        self.flee: Optional[FleeMap] = None
+        # entity paths are LOS-smoothed into straight legs when on; off by default because the
+        # smoothed legs are walked diagonally, which shortens routes and so changes movement balance
+        self.smooth_paths = False
+        # with a budget, entity replans are queued and time-sliced instead of solved inline;
+        # a node budget keeps that replayable, a microsecond one doesn't
+        self.path_queue: Optional[PathRequestQueue] = None
+        if path_budget_nodes is not None or path_budget_us is not None:
+            self.path_queue = PathRequestQueue(budget_us=path_budget_us or 0, budget_nodes=path_budget_nodes,
+                                               on_complete=self._path_request_done)
+        # or offloaded to a worker pool working on a snapshot of the grid
+        self.path_pool: Optional[PathWorkerPool] = None
+        if path_workers:
+            self.path_pool = PathWorkerPool(workers=path_workers, mode=path_worker_mode)
+
+        # line of sight: per-map bitset table, built at reset when enabled (and kept on disk
+        # under los_cache_dir, if given)
+        self.precompute_los = precompute_los
+        self.los_cache_dir = los_cache_dir
+        self.los_table: Optional[VisibilityTable] = None
+
+        # operative -> can see the anomaly, shared by the AI and the renderer for a tick;
+        # recomputed whenever the map or the spatial hash (any entity's cell) changed revision
+        self.sight: Dict["Operative", bool] = {}
+        self.sight_stamp = None
+
+        # FX
+        self.tracers: List[Tracer] = []
+
+        self.reset_operation(seed)
+
+    def los(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        table = self.los_table
+        if table is not None and table.revision == self.grid_revision:
+            seen = table.visible(a, b)
+            if seen is not None:
+                return seen
+        return los_clear(self.grid, a, b)
+
+    def view_cells(self, origin: Tuple[int, int], radius: int) -> List[int]:
+        # indices (y * w + x) of the cells origin sees within a Manhattan radius, by los()
+        ox, oy = origin
+        w, h = self.map_w, self.map_h
+        los = self.los
+        cells = []
+        for dx, dy in diamond_offsets(radius):
+            x, y = ox + dx, oy + dy
+            if 0 <= x < w and 0 <= y < h and los(origin, (x, y)):
+                cells.append(y * w + x)
+        return cells
+
+    def refresh_sight(self):
+        stamp = (self.grid_revision, self.space.revision)
+        if stamp == self.sight_stamp:
+            return
+        self.sight_stamp = stamp
+        a = self.anomaly
+        self.sight = {op: op.can_see(self, (a.gx, a.gy)) for op in self.operatives} if a else {}
+
+    def sees_anomaly(self, op: "Operative") -> bool:
+        self.refresh_sight()
+        return self.sight.get(op, False)
+
+    @staticmethod
+    def is_operative(e) -> bool:
+        return isinstance(e, Operative)
+
+    @staticmethod
+    def is_live_operative(e) -> bool:
+        return isinstance(e, Operative) and e.alive
+
+    @staticmethod
+    def is_active_operative(e) -> bool:
+        return isinstance(e, Operative) and e.alive and not e.incapacitated
+
+    def is_passable(self, cell: Tuple[int, int]) -> bool:
+        x, y = cell
+        return 0 <= x < self.map_w and 0 <= y < self.map_h and self.grid[y][x] != 1
+
+    def flee_map(self) -> FleeMap:
+        # rebuilt only when a living operative changes cell (or the map changes)
+        sources = tuple((op.gx, op.gy) for op in self.operatives if op.alive)
+        fm = self.flee
+        if fm is None or fm.sources != sources or fm.revision != self.grid_revision:
+            fm = self.flee = FleeMap(self.grid, list(sources), revision=self.grid_revision)
+        return fm
+
+    def goal_field(self, goal: Tuple[int, int]) -> DistanceField:
+        field = self.goal_fields.get(goal)
+        if field is None or field.revision != self.grid_revision:
+            # only keep fields for goals that are still popular
+            popular = (self.extraction, self.team_last_known_anomaly)
+            self.goal_fields = {g: f for g, f in self.goal_fields.items() if g in popular and f.revision == self.grid_revision}
+            field = DistanceField(self.grid, goal, revision=self.grid_revision)
+            self.goal_fields[goal] = field
+        return field
+
+    def make_path(self, p: List[Tuple[int, int]]) -> Path:
+        return Path(p, grid=self.grid if self.smooth_paths else None)
+
+    def plan_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # extraction and the last known anomaly position are shared by the whole team,
+        # so those read from one flood fill instead of one search per operative
+        if goal == self.extraction or goal == self.team_last_known_anomaly:
+            return self.goal_field(goal).path_from(start)
+        path = self.path_cache.get(start, goal, self.grid_revision)
+        if path is None:
+            # with the hierarchy, long paths are refined whole (full=True), since walking the
+            # stored fields is cheap next to the abstract search a per-segment replan would
+            # repeat, and the AI re-decides its target whenever a path runs out
+            if self.hierarchical_paths:
+                path = self.hierarchy().find_path(start, goal)
+            else:
+                path = find_path(self.grid, start, goal)
+            self.path_cache.put(start, goal, self.grid_revision, path)
+        return path
+
+    def request_path(self, entity: Entity, goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        # plan for an entity: answered immediately when cheap (no queue, shared field,
+        # cache hit), otherwise queued and delivered later through entity.path_request
+        start = (entity.gx, entity.gy)
+        asynchronous = self.path_pool is not None or self.path_queue is not None
+        if not asynchronous or goal == self.extraction or goal == self.team_last_known_anomaly:
+            return self.plan_path(start, goal)
+        path = self.path_cache.get(start, goal, self.grid_revision)
+        if path is not None:
+            return path
+        self.cancel_path_request(entity)
+        if self.path_pool is not None:
+            self.path_pool.set_grid(self.grid, self.grid_revision)
+            entity.path_request = self.path_pool.submit(start, goal)
+        else:
+            entity.path_request = self.path_queue.submit(self.grid, start, goal)
+        return None
+
+    def chase_path(self, op: Operative, goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # chasers repair their own search tree as they and the target move
+        if goal == self.team_last_known_anomaly:
+            return self.plan_path((op.gx, op.gy), goal)
+        planner = op.chase_planner
+        if planner is None or planner.revision != self.grid_revision:
+            planner = op.chase_planner = ChasePlanner(self.grid, (op.gx, op.gy), goal, revision=self.grid_revision)
+        else:
+            planner.move_start((op.gx, op.gy))
+            planner.move_goal(goal)
+        return planner.path()
+
+    def cancel_path_request(self, entity: Entity):
+        if self.path_queue is not None:
+            self.path_queue.cancel(entity.path_request)
+        if self.path_pool is not None:
+            self.path_pool.cancel(entity.path_request)
+        entity.path_request = None
+
+    def collect_pooled_paths(self):
+        for req in self.path_pool.collect():
+            if not req.cancelled and req.revision == self.grid_revision:
+                self.path_cache.put(req.start, req.goal, req.revision, req.path)
+
+    def close(self):
+        if self.path_pool is not None:
+            self.path_pool.shutdown()
+            self.path_pool = None
+
+    def _path_request_done(self, req: PathRequest):
+        self.path_cache.put(req.start, req.goal, self.grid_revision, req.path)
+
+    def hierarchy(self) -> HierarchicalPlanner:
+        # building/door abstraction, precomputed once per map revision
+        if self.hpa is None or self.hpa.revision != self.grid_revision:
+            self.hpa = HierarchicalPlanner(self.grid, self.building_id, self.buildings, revision=self.grid_revision)
+        return self.hpa
+
+    @property
+    def grid_revision(self) -> int:
+        return self.grid.revision
+
+    def mark_grid_changed(self, x0: int = 0, y0: int = 0, x1: Optional[int] = None, y1: Optional[int] = None):
+        # tiles in the inclusive rectangle changed (whole map by default): anything keyed on
+        # the grid revision (goal fields, cached paths, hierarchy) is now stale, and chase
+        # planners restart their search trees on the new tiles
+        self.grid.mark_dirty(x0, y0, x1, y1)
+        self.goal_fields = {}
+        self.hpa = None
+        x1 = self.map_w - 1 if x1 is None else x1
+        y1 = self.map_h - 1 if y1 is None else y1
+        cells = [(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+        for op in self.operatives:
+            if op.chase_planner is not None:
+                op.chase_planner.notify_changed(self.grid, cells, revision=self.grid_revision)
+
+    @property
+    def deterministic(self) -> bool:
+        # a seed replays the run exactly unless paths arrive by wall-clock time (worker pool,
+        # or a queue on a microsecond budget)
+        return self.path_pool is None and (self.path_queue is None or self.path_queue.deterministic)
+
+    def reseed(self, seed: int):
+        self.seed = seed
+        self.map_rng = random.Random(f"{seed}/mapgen")
+        self.ai_rng = random.Random(f"{seed}/ai")
+        self.combat_rng = random.Random(f"{seed}/combat")
+
+    def reset_operation(self, seed: Optional[int] = None):
+        # a fresh operation; the same seed (and orders) plays out the same way
+        self.reseed(seed if seed is not None else random.randrange(1 << 32))
+        self.elapsed = 0.0
+        self.phase = "operation"
+        self.outcome = None
+        self.paused = False
+        self.retreat_order = False
+        self.team_last_known_anomaly = None
+        self.tracers = []
+        self.fog_views = {}
+        self.sight_stamp = None
+        self.stats = OperationStats()
+
+        if self.path_queue is not None:
+            self.path_queue.clear()
+
+        grid, building_id, self.buildings = generate_facility(self.map_w, self.map_h, num_buildings=6, rng=self.map_rng)
+        self.grid = NavGrid.from_lists(grid, building_id)
+        self.building_id = self.grid.building
+        self.revealed = self.grid.revealed
+        self.visited = self.grid.visited
+
+        # entry/extraction points (outdoor)
+        self.entry = (2, self.map_h // 2)
+        self.extraction = (self.map_w - 3, self.map_h // 2)
+        self.grid[self.entry[1]][self.entry[0]] = 0
+        self.grid[self.extraction[1]][self.extraction[0]] = 0
+
+        # ensure a corridor-ish passable strip between entry & extraction
+        if not find_path(self.grid, self.entry, self.extraction):
+            _dig_corridor(self.grid, self.entry, self.extraction, self.map_rng)
+        self.mark_grid_changed()
+        self.path_cache.clear()
+        # the team can only ever walk the region around the entry, so that's all it explores
+        self.frontier = Frontier(self.grid, origin=self.entry)
+        if self.precompute_los:
+            self.los_table = VisibilityTable(self.grid, LOS_TABLE_RANGE, revision=self.grid_revision, cache_dir=self.los_cache_dir)
+
+        self.log = EventLog()
+        self.log.add("New operation initialized.")
+        self.log.add("Objective: contain the anomaly and extract survivors.")
+        self.log.add("Facility: multiple structures detected. Sweep & contain.")
+
+        self.operatives = self.build_team()
+
+        self.anomaly = self.build_anomaly(self.anomaly_spawn())
+
+        self.space = SpatialHash(self.map_w, self.map_h)
+        for op in self.operatives:
+            self.space.insert(op)
+        self.space.insert(self.anomaly)
+        # hit tables depend on both sides, so they're built once both exist
+        self.anomaly.build_hit_tables(self.operatives)
+        for op in self.operatives:
+            op.build_hit_table(self.anomaly)
+
+        self.log.add(f"Anomaly registered: {self.anomaly.code}.")
+        self.log.add("Rules of engagement: survive, stabilize, contain (lethal force may not fully stop it).")
+
+        self.update_fog()
+
+    def build_team(self) -> List[Operative]:
+        names = ["Vega", "Kline", "Mori", "Ash", "Rook", "Silva"]
+        team = []
+
+        # floor cells near the entry that aren't right on top of the extraction
+        spawn_cells = [c for c in self.grid.floor_index().near(self.entry, 5, avoid=[self.extraction])
+                       if self.grid.connected(self.entry, c)]
+        if not spawn_cells:
+            spawn_cells = [self.entry]
+
+        for i, role in enumerate(self.team):
+            base = ROLE_TEMPLATES[role]
+            attrs = {k: jitter_base(base[k], spread=4, rng=self.map_rng) for k in ATTR_KEYS}
+            gx, gy = self.map_rng.choice(spawn_cells)
+            op = Operative(names[i % len(names)], role, gx, gy, attrs, weapon=self.role_weapons.get(role))
+            team.append(op)
+
+        self.log.add("Operatives inserted: " + ", ".join([f"{op.name} ({op.role}/{op.weapon.name})" for op in team]) + ".")
+        return team
+
+    def anomaly_spawn(self) -> Tuple[int, int]:
+        # preferably inside a random building, and never in a pocket the team can't walk into
+        # (that operation can only run out the clock)
+        for _ in range(8):
+            if self.buildings:
+                b = self.map_rng.choice(self.buildings)
+                spawn = random_floor_cell(self.grid, zone=b.bid, rng=self.map_rng) if b.interior_cells else random_floor_cell(self.grid, avoid=[self.entry, self.extraction], rng=self.map_rng)
+            else:
+                spawn = random_floor_cell(self.grid, avoid=[self.entry, self.extraction], rng=self.map_rng)
+            if self.grid.connected(self.entry, spawn):
+                return spawn
+        cells = [c for c in self.grid.floor_cells() if self.grid.connected(self.entry, c)]
+        return self.map_rng.choice(cells)
+
+    def build_anomaly(self, spawn: Tuple[int, int]) -> Anomaly:
+        codes = ["SCP-███", "SCP-Δ13", "SCP-2470", "SCP-Ω9", "SCP-██-K"]
+        code = self.map_rng.choice(codes)
+
+        stats = {k: self.map_rng.randint(lo, hi) for k, (lo, hi) in self.anomaly_ranges.items()}
+        return Anomaly(code, spawn[0], spawn[1], **stats)
+
+    def update_fog(self):
+        # revealed is the team's map knowledge and is tracked even with fog drawing off;
+        # only operatives whose cell, radius or the map changed since last tick recompute
+        revealed = self.revealed
+        for op in self.operatives:
+            if not op.alive:
+                continue
+            view = ((op.gx, op.gy), op.perception_radius(), self.grid_revision)
+            if self.fog_views.get(op) == view:
+                continue
+            self.fog_views[op] = view
+            self.frontier.reveal(revealed.set_many(self.view_cells(view[0], view[1])))
+
+    def any_alive(self) -> bool:
+        return any(op.alive for op in self.operatives)
+
+    def update_phase_outcomes(self):
+        if self.phase in ("success", "failure"):
+            return
+
+        if self.elapsed >= self.deadline:
+            self.phase = "failure"
+            self.outcome = "deadline"
+            self.log.add("OPERATION FAILED: Time limit exceeded. Anomaly activity lost.")
+            return
+
+        if self.anomaly and not self.anomaly.contained:
+            at_edge = self.anomaly.gx <= 1 or self.anomaly.gx >= self.map_w - 2 or self.anomaly.gy <= 1 or self.anomaly.gy >= self.map_h - 2
+            if at_edge and self.anomaly.escape_timer > 12:
+                self.phase = "failure"
+                self.outcome = "escaped"
+                self.log.add("OPERATION FAILED: Anomaly escaped containment zone.")
+                return
+
+        if not self.any_alive():
+            self.phase = "failure"
+            self.outcome = "team_lost"
+            self.log.add("OPERATION FAILED: All operatives lost.")
+            return
+
+        if self.anomaly and self.anomaly.contained:
+            survivors = [op for op in self.operatives if op.alive]
+            if survivors and all(manhattan((op.gx, op.gy), self.extraction) <= 3 for op in survivors):
+                self.phase = "success"
+                self.outcome = "extracted"
+                self.log.add("MISSION SUCCESS: Survivors extracted with contained anomaly.")
+                return
+
+    @property
+    def finished(self) -> bool:
+        return self.phase in ("success", "failure")
+
+    def summary(self) -> Dict[str, object]:
+        # one operation's outcome, as plain data
+        a = self.anomaly
+        return {
+            "phase": self.phase,
+            "outcome": self.outcome,
+            "elapsed": round(self.elapsed, 2),
+            "contained": bool(a and a.contained),
+            "kia": self.stats.kia,
+            "survivors": sum(op.alive for op in self.operatives),
+            "shots_fired": self.stats.shots_fired,
+            "shots_hit": self.stats.shots_hit,
+            "containment_attempts": self.stats.containment_attempts,
+            "anomaly": {k: getattr(a, k) for k in self.anomaly_ranges} if a else None,
+        }
+
+    # ==========================
+    # Orders
+    # ==========================
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self.log.add("Paused." if self.paused else "Resumed.")
+
+    def order_retreat(self):
+        self.retreat_order = True
+        self.phase = "extraction"
+        self.log.add("RETREAT ORDER: All operatives extract immediately!")
+
+    def order_move(self, op: Operative, cell: Tuple[int, int]):
+        if not op.alive or not self.is_passable(cell):
+            return
+        self.cancel_path_request(op)
+        op.manual_target = cell
+        op.path = self.make_path(self.plan_path((op.gx, op.gy), cell))
+        self.log.add(f"{op.name} manual move -> ({cell[0]}, {cell[1]}).")
+
+    def clear_orders(self, op: Operative):
+        self.cancel_path_request(op)
+        op.manual_target = None
+        op.path = Path()
+        self.log.add(f"{op.name} manual orders cleared.")
+
+    def update_fx(self, dt):
+        keep = []
+        for t in self.tracers:
+            t.ttl -= dt
+            if t.ttl > 0:
+                keep.append(t)
+        self.tracers = keep
+
+    def step(self):
+        self.update(TICK)
+
+    def update(self, dt):
+        if self.paused or self.finished:
+            self.update_fx(dt)
+            return
+
+        self.elapsed += dt
+        self.refresh_sight()
+
+        if self.path_queue is not None:
+            self.path_queue.process()
+        if self.path_pool is not None:
+            self.collect_pooled_paths()
+
+        for op in self.operatives:
+            op.update(self, dt)
+
+        if self.anomaly:
+            self.anomaly.update(self, dt)
+
+        self.update_fog()
+        self.update_fx(dt)
+        self.update_phase_outcomes()
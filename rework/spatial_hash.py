@@ -0,0 +1,146 @@
+from typing import Callable, Dict, Optional, Tuple
+
+
+class SpatialHash:
+    """Entities bucketed by grid cell (bucket x bucket cells per bucket).
+
+    Entities report their moves via move() whenever gx/gy change. Distances are
+    Manhattan, like the rest of the sim, and results come back in insertion
+    order (ties included), so they never depend on dict or set ordering and a
+    seeded run stays repeatable. `revision` goes up whenever an entity is added,
+    removed or changes cell, so callers can tell cheaply if anything moved.
+    """
+
+    # at or below this many entities nearest() just scans them all
+    LINEAR_MAX = 32
+
+    def __init__(self, map_w: int, map_h: int, bucket: int = 4):
+        self.bucket = bucket
+        self.cols = (map_w + bucket - 1) // bucket
+        self.rows = (map_h + bucket - 1) // bucket
+        self.buckets: Dict[Tuple[int, int], list] = {}
+        self.cells: Dict[object, Tuple[int, int]] = {}
+        self.order: Dict[object, int] = {}
+        self._next_uid = 0
+        self.revision = 0
+
+    def _key(self, cell: Tuple[int, int]) -> Tuple[int, int]:
+        return cell[0] // self.bucket, cell[1] // self.bucket
+
+    def insert(self, e):
+        cell = (e.gx, e.gy)
+        self.cells[e] = cell
+        self.order[e] = self._next_uid
+        self._next_uid += 1
+        self.buckets.setdefault(self._key(cell), []).append(e)
+        e.space = self
+        self.revision += 1
+
+    def remove(self, e):
+        cell = self.cells.pop(e, None)
+        if cell is None:
+            return
+        del self.order[e]
+        self.buckets[self._key(cell)].remove(e)
+        e.space = None
+        self.revision += 1
+
+    def move(self, e):
+        old = self.cells.get(e)
+        cell = (e.gx, e.gy)
+        if old is None or old == cell:
+            return
+        self.cells[e] = cell
+        self.revision += 1
+        ok, nk = self._key(old), self._key(cell)
+        if ok != nk:
+            self.buckets[ok].remove(e)
+            self.buckets.setdefault(nk, []).append(e)
+
+    def clear(self):
+        for e in self.cells:
+            e.space = None
+        self.buckets = {}
+        self.cells = {}
+        self.order = {}
+        self.revision += 1
+
+    # --------------------------
+    # queries
+    # --------------------------
+    def at(self, cell: Tuple[int, int], pred: Optional[Callable] = None) -> list:
+        found = [e for e in self.buckets.get(self._key(cell), ()) if self.cells[e] == cell and (pred is None or pred(e))]
+        found.sort(key=self.order.__getitem__)
+        return found
+
+    def query_radius(self, cell: Tuple[int, int], r: int, pred: Optional[Callable] = None) -> list:
+        # everything within Manhattan distance r of cell
+        x, y = cell
+        b = self.bucket
+        found = []
+        for by in range((y - r) // b, (y + r) // b + 1):
+            for bx in range((x - r) // b, (x + r) // b + 1):
+                for e in self.buckets.get((bx, by), ()):
+                    ex, ey = self.cells[e]
+                    if abs(ex - x) + abs(ey - y) <= r and (pred is None or pred(e)):
+                        found.append(e)
+        found.sort(key=self.order.__getitem__)
+        return found
+
+    def count_radius(self, cell: Tuple[int, int], r: int, pred: Optional[Callable] = None) -> int:
+        return len(self.query_radius(cell, r, pred))
+
+    def nearest(self, cell: Tuple[int, int], pred: Optional[Callable] = None, max_r: Optional[int] = None):
+        # closest entity by Manhattan distance, earliest inserted on ties
+        x, y = cell
+        best, best_d = None, (max_r + 1 if max_r is not None else 1 << 30)
+        if len(self.cells) <= self.LINEAR_MAX:
+            # a handful of entities: a plain scan beats walking bucket rings. cells iterates in
+            # insertion order (move() keeps the key in place), so the first closest one wins ties
+            for e, (ex, ey) in self.cells.items():
+                d = abs(ex - x) + abs(ey - y)
+                if d < best_d and (pred is None or pred(e)):
+                    best, best_d = e, d
+            return best
+
+        b = self.bucket
+        cx, cy = self._key(cell)
+        order = self.order
+        best = None
+        last = max(cx, self.cols - 1 - cx, cy, self.rows - 1 - cy)
+        for ring in range(last + 1):
+            # every cell in this ring is at least (ring - 1) * bucket + 1 away
+            near = (ring - 1) * b + 1 if ring else 0
+            if (best is not None and near > best_d) or (max_r is not None and near > max_r):
+                break
+            for key in self._ring(cx, cy, ring):
+                for e in self.buckets.get(key, ()):
+                    ex, ey = self.cells[e]
+                    d = abs(ex - x) + abs(ey - y)
+                    if max_r is not None and d > max_r:
+                        continue
+                    if best is not None and (d > best_d or (d == best_d and order[e] > order[best])):
+                        continue
+                    if pred is not None and not pred(e):
+                        continue
+                    best, best_d = e, d
+        return best
+
+    def _ring(self, cx: int, cy: int, ring: int):
+        # bucket keys on the square ring at Chebyshev distance `ring`, clamped to the grid
+        if ring == 0:
+            yield cx, cy
+            return
+        x0, x1 = max(0, cx - ring), min(self.cols - 1, cx + ring)
+        for by in (cy - ring, cy + ring):
+            if 0 <= by < self.rows:
+                for bx in range(x0, x1 + 1):
+                    yield bx, by
+        y0, y1 = max(0, cy - ring + 1), min(self.rows - 1, cy + ring - 1)
+        for bx in (cx - ring, cx + ring):
+            if 0 <= bx < self.cols:
+                for by in range(y0, y1 + 1):
+                    yield bx, by
+
+    def __len__(self):
+        return len(self.cells)
@@ -0,0 +1,27 @@
+import os
+import random
+import sys
+
+import pytest
+
+# the rework modules import each other by bare name, so run them from their own folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from navgrid import NavGrid
+from sim_core import generate_facility
+
+
+def make_facility(seed: int, map_w: int = 52, map_h: int = 34) -> NavGrid:
+    grid, building_id, _ = generate_facility(map_w, map_h, num_buildings=6, rng=random.Random(seed))
+    return NavGrid.from_lists(grid, building_id)
+
+
+def sample_pairs(nav: NavGrid, n: int, seed: int = 0):
+    rng = random.Random(seed)
+    cells = nav.floor_cells()
+    return [(rng.choice(cells), rng.choice(cells)) for _ in range(n)]
+
+
+@pytest.fixture(params=[1, 2, 3])
+def facility(request) -> NavGrid:
+    return make_facility(request.param)
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from batch_runner import parse_args, run_one, run_options, wilson
+from sim_core import OperationCore, PATH_BUDGET_NODES
+
+
+def play(sim: OperationCore) -> OperationCore:
+    while not sim.finished:
+        sim.step()
+    return sim
+
+
+@pytest.mark.parametrize("seed", [3, 5])
+def test_batch_run_replays_in_viewer(seed):
+    # main.py builds its sim with these core options; the batch defaults must play the same game
+    batch = run_one(seed, run_options(parse_args([])))
+    viewer = play(OperationCore(seed=seed, path_budget_nodes=PATH_BUDGET_NODES))
+    batch.pop("wall")
+    assert batch == {"seed": seed, **viewer.summary()}
+
+
+def test_seed_is_deterministic():
+    state = random.getstate()
+    a = play(OperationCore(seed=42, precompute_los=False, path_budget_nodes=PATH_BUDGET_NODES))
+    b = play(OperationCore(seed=42, precompute_los=False, path_budget_nodes=PATH_BUDGET_NODES))
+    assert a.deterministic
+    assert a.log.lines == b.log.lines
+    assert a.summary() == b.summary()
+    # the sim never draws from the global generator
+    assert random.getstate() == state
+
+
+def test_wilson_interval_bounds():
+    assert wilson(0, 0) == (0.0, 1.0)
+    lo, hi = wilson(0, 20)
+    assert lo == 0.0 and 0 < hi < 0.2
+    lo, hi = wilson(20, 20)
+    assert 0.8 < lo < 1.0 and hi == 1.0
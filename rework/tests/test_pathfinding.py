@@ -0,0 +1,105 @@
+from chase_planner import ChasePlanner
+from pathfinding import DistanceField, PathCache, astar, jps
+from sim_core import OperationCore
+
+from conftest import sample_pairs
+
+
+def is_walk(nav, path, start, goal):
+    # 4-connected steps over walkable cells from start to goal
+    if path[0] != start or path[-1] != goal:
+        return False
+    steps = zip(path, path[1:])
+    return all(nav[y][x] != 1 for x, y in path) and all(abs(ax - bx) + abs(ay - by) == 1 for (ax, ay), (bx, by) in steps)
+
+
+def test_plan_path_is_exact_on_default_map():
+    sim = OperationCore(seed=4, precompute_los=False)
+    assert not sim.hierarchical_paths
+    for start, goal in sample_pairs(sim.grid, 150, seed=4):
+        expected = astar(sim.grid, start, goal)
+        path = sim.plan_path(start, goal)
+        assert len(path) == len(expected)
+        if path:
+            assert is_walk(sim.grid, path, start, goal)
+    assert sim.hpa is None
+
+
+def test_hierarchy_only_on_large_maps():
+    assert OperationCore(map_w=100, map_h=64, seed=1, precompute_los=False).hierarchical_paths
+    assert OperationCore(seed=1, precompute_los=False, hierarchical_paths=True).hierarchical_paths
+
+
+def test_chase_planner_matches_astar(facility):
+    # a chaser walking its path while the target wanders keeps returning A*-length paths
+    pairs = sample_pairs(facility, 40, seed=6)
+    start, goal = pairs[0]
+    planner = ChasePlanner(facility, start, goal)
+    for _, goal in pairs[1:]:
+        planner.move_goal(goal)
+        path = planner.path()
+        assert len(path) == len(astar(facility, start, goal))
+        if len(path) > 3:
+            start = path[3]
+            planner.move_start(start)
+
+
+def test_grid_edit_reaches_chase_planner():
+    sim = OperationCore(seed=5, precompute_los=False)
+    op = sim.operatives[0]
+    goal = sim.extraction
+    sim.team_last_known_anomaly = None
+    path = sim.chase_path(op, goal)
+    planner = op.chase_planner
+    assert len(path) > 4
+    # wall off a cell on the chaser's route
+    x, y = path[len(path) // 2]
+    sim.grid[y][x] = 1
+    sim.mark_grid_changed(x, y, x, y)
+    assert planner.revision == sim.grid_revision
+    path = sim.chase_path(op, goal)
+    assert op.chase_planner is planner
+    assert (x, y) not in path
+    assert len(path) == len(astar(sim.grid, (op.gx, op.gy), goal))
+
+
+def test_jps_matches_astar(facility):
+    for start, goal in sample_pairs(facility, 200, seed=1):
+        expected = astar(facility, start, goal)
+        path = jps(facility, start, goal)
+        assert len(path) == len(expected)
+        if path:
+            assert is_walk(facility, path, start, goal)
+
+
+def test_distance_field_matches_astar(facility):
+    pairs = sample_pairs(facility, 120, seed=2)
+    field = DistanceField(facility, pairs[0][1])
+    for start, _ in pairs:
+        expected = astar(facility, start, field.goal)
+        assert field.distance(start) == len(expected) - 1
+        path = field.path_from(start)
+        assert len(path) == len(expected)
+        if path:
+            assert is_walk(facility, path, start, field.goal)
+
+
+def test_path_cache_answers_match_astar(facility):
+    cache = PathCache(capacity=64)
+    goals = [goal for _, goal in sample_pairs(facility, 4, seed=3)]
+    for i, (start, _) in enumerate(sample_pairs(facility, 80, seed=4)):
+        goal = goals[i % len(goals)]
+        path = cache.get(start, goal, facility.revision)
+        expected = astar(facility, start, goal)
+        if path is None:
+            cache.put(start, goal, facility.revision, expected)
+            continue
+        # exact or sub-path hit: still a shortest walk from start
+        assert len(path) == len(expected)
+        if path:
+            assert is_walk(facility, path, start, goal)
+    assert cache.subpath_hits > 0
+    assert len(cache) <= 64
+    # a new grid revision never sees the old entries
+    start, goal = next(iter(cache.entries))[:2]
+    assert cache.get(start, goal, facility.revision + 1) is None
@@ -0,0 +1,80 @@
+import pytest
+
+from sim_core import DamageOverTime, OperationCore, los_clear, manhattan
+
+
+def test_fog_reveals_what_los_clear_sees():
+    sim = OperationCore(seed=8, precompute_los=False)
+    for _ in range(600):
+        sim.step()
+    expected = set()
+    for op in sim.operatives:
+        if not op.alive:
+            continue
+        origin, r = (op.gx, op.gy), op.perception_radius()
+        assert set(sim.view_cells(origin, r)) == {
+            y * sim.map_w + x for y in range(sim.map_h) for x in range(sim.map_w)
+            if manhattan(origin, (x, y)) <= r and los_clear(sim.grid, origin, (x, y))}
+        expected.update(sim.view_cells(origin, r))
+    revealed = {y * sim.map_w + x for y in range(sim.map_h) for x in range(sim.map_w) if sim.revealed.get(x, y)}
+    assert expected <= revealed
+
+
+def test_los_table_agrees_with_los_clear():
+    sim = OperationCore(seed=8)
+    assert sim.los_table is not None
+    for op in sim.operatives:
+        origin = (op.gx, op.gy)
+        for x in range(sim.map_w):
+            for y in range(sim.map_h):
+                assert sim.los(origin, (x, y)) == los_clear(sim.grid, origin, (x, y))
+
+
+def test_sight_cache_follows_moves():
+    sim = OperationCore(seed=2, precompute_los=False)
+    for _ in range(900):
+        sim.step()
+        a = sim.anomaly
+        for op in sim.operatives:
+            assert sim.sees_anomaly(op) == op.can_see(sim, (a.gx, a.gy))
+    stamp = sim.sight_stamp
+    sim.refresh_sight()
+    assert sim.sight_stamp == stamp
+    op = sim.operatives[0]
+    op.set_grid_pos(*sim.extraction)
+    sim.refresh_sight()
+    assert sim.sight_stamp != stamp
+
+
+@pytest.mark.parametrize("seed", [0, 19, 33])
+def test_team_never_targets_unreachable_cells(seed):
+    # seed 0 reveals a sealed room, seed 19 spawns the anomaly in one; either used to
+    # stall the team on a failing search every tick until the deadline
+    sim = OperationCore(seed=seed, precompute_los=False)
+    assert sim.grid.connected(sim.entry, (sim.anomaly.gx, sim.anomaly.gy))
+    while not sim.finished:
+        sim.step()
+        for op in sim.operatives:
+            if op.manual_target is not None and op.state in ("search", "manual"):
+                assert sim.grid.connected(sim.entry, op.manual_target)
+        assert all(sim.grid.connected(sim.entry, cell) for _, cell in sim.frontier.candidates())
+    assert sim.outcome != "deadline"
+
+
+def test_bleeding_out_counts_as_kia():
+    sim = OperationCore(seed=6, precompute_los=False)
+    op = sim.operatives[0]
+    op.hp = 1.0
+    op.bleeds.append(DamageOverTime(dps=5.0, duration=5.0))
+    op.update_bleeding(sim, 1.0)
+    assert not op.alive
+    assert sim.stats.kia == 1
+    assert sim.summary()["kia"] == 1
+
+
+@pytest.mark.parametrize("seed", [25, 32])
+def test_kia_matches_dead_operatives(seed):
+    sim = OperationCore(seed=seed, precompute_los=False)
+    while not sim.finished:
+        sim.step()
+    assert sim.stats.kia == sum(not op.alive for op in sim.operatives)